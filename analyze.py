@@ -0,0 +1,228 @@
+"""Bulk position analysis from the command line, without the web app.
+
+Reads one position per line, from files or stdin::
+
+    X.O.X.... [rows cols k]
+
+``X``/``O`` are marks, ``.``, ``-`` or ``_`` empty cells, and ``/`` or ``|``
+may separate rows. Without the optional shape the board is square with
+``k`` equal to its side (``--rows``/``--cols``/``--k`` change the default).
+The side to move follows from the mark counts. Blank lines and lines
+starting with ``#`` are skipped.
+
+Each position gets one JSON line on stdout, in input order::
+
+    {"board": "X.O.X....", "toMove": "O", "best": 8, "value": 0, "exact": true,
+     "scores": [null, -999998, null, -999998, null, -999998, -999998, -999998, 0]}
+
+``scores`` holds, per cell, the negamax score of playing there for the side
+to move (``null`` if taken): 0 is a draw and forced wins and losses are
+``±1_000_000`` minus the plies to the end. ``value`` is 1, 0 or -1 when the
+best score is exact, else ``null``. With ``--game-log`` the input is every
+AI decision in a game log (see gamelog.py), and each line also carries the
+move that was ``played`` and the ``mode`` that played it. Examples::
+
+    python analyze.py positions.txt > analysis.jsonl
+    python analyze.py --game-log games.log --workers 8 | grep -v '"value":1'
+    python analyze.py --rows 4 --k 3 --time-budget 0.5 < positions4x4.txt
+
+Positions are read lazily and handed to a process pool in chunks, with a
+bounded number of chunks in flight, so memory stays flat however long the
+input is.
+"""
+from __future__ import annotations
+
+import argparse
+import fileinput
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from gamelog import read_games
+from tictactoe import WIN_SCORE, TicTacToe, negamax_best_move, other_player, player_to_move
+
+
+# Scores beyond this are forced results rather than heuristic estimates.
+_FORCED = WIN_SCORE // 2
+_EMPTY = ".-_"
+_ROW_SEPARATORS = "/|"
+
+# board text, rows, cols, k (0 = default for that board), extra output fields
+Position = Tuple[str, int, int, int, Dict[str, object]]
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Search limits per position; ``None`` everywhere solves exactly."""
+
+    max_depth: Optional[int] = None
+    time_budget: Optional[float] = None
+    node_budget: Optional[int] = None
+
+
+def parse_position(text: str, rows: int = 0, cols: int = 0, k: int = 0) -> TicTacToe:
+    """Build the game for one board string; raises ``ValueError`` if it is malformed."""
+    cells = "".join(c for c in text if c not in _ROW_SEPARATORS).upper()
+    if not rows:
+        side = math.isqrt(len(cells))
+        if side * side != len(cells):
+            raise ValueError(f"A board of {len(cells)} cells is not square; give rows and cols")
+        rows = side
+    cols = cols or len(cells) // rows
+    if rows * cols != len(cells):
+        raise ValueError(f"Expected {rows * cols} cells, got {len(cells)}")
+    game = TicTacToe(rows, cols, k or min(rows, cols))
+    board = []
+    for c in cells:
+        if c in _EMPTY:
+            board.append(" ")
+        elif c in "XO":
+            board.append(c)
+        else:
+            raise ValueError(f"Unexpected cell {c!r}")
+    game.board = board
+    return game
+
+
+def _child_score(game: TicTacToe, move: int, player: str, budget: Budget, share: int) -> Tuple[int, bool]:
+    """Score of ``move`` for ``player``, and whether it is exact."""
+    if game.completes_line(move, player):
+        return WIN_SCORE - 1, True
+    game.push(move, player)
+    try:
+        reply = negamax_best_move(
+            game,
+            other_player(player),
+            max_depth=budget.max_depth - 1 if budget.max_depth else None,
+            time_budget=budget.time_budget / share if budget.time_budget else None,
+            node_budget=budget.node_budget // share if budget.node_budget else None,
+        )
+    finally:
+        game.pop()
+    score = -reply.score
+    # The reply's forced result is one ply further away from here.
+    if score > _FORCED:
+        score -= 1
+    elif score < -_FORCED:
+        score += 1
+    return score, reply.complete
+
+
+def analyze_position(game: TicTacToe, budget: Budget = Budget()) -> Dict[str, object]:
+    player = player_to_move(game)
+    if player is None:
+        raise ValueError("Mark counts don't allow either side to move")
+    scores: List[Optional[int]] = [None] * game.size
+    if game.is_terminal():
+        # A finished game with a winner was won by the side that just moved.
+        value = -1 if game._check_winner() is not None else 0
+        return {"toMove": player, "best": -1, "value": value, "exact": True, "scores": scores}
+
+    moves = game.available_moves()
+    best, best_score, exact = -1, -WIN_SCORE - 1, True
+    for move in moves:
+        score, complete = _child_score(game, move, player, budget, len(moves))
+        scores[move] = score
+        exact = exact and complete
+        if score > best_score:
+            best, best_score = move, score
+    # A forced win is exact even if other moves weren't searched to the end.
+    exact = exact or best_score > _FORCED
+    value = (best_score > 0) - (best_score < 0) if exact else None
+    return {"toMove": player, "best": best, "value": value, "exact": exact, "scores": scores}
+
+
+def _analyze_chunk(chunk: List[Position], budget: Budget) -> List[Dict[str, object]]:
+    results = []
+    for text, rows, cols, k, extra in chunk:
+        result: Dict[str, object] = {"board": text}
+        try:
+            result.update(analyze_position(parse_position(text, rows, cols, k), budget))
+        except ValueError as exc:
+            result["error"] = str(exc)
+        result.update(extra)
+        results.append(result)
+    return results
+
+
+def read_positions(lines: Iterable[str], rows: int = 0, cols: int = 0, k: int = 0) -> Iterator[Position]:
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        shape = [int(f) for f in fields[1:4] if f.isdigit()]
+        line_rows, line_cols, line_k = shape + [rows, cols, k][len(shape):]
+        yield fields[0], line_rows, line_cols, line_k, {}
+
+
+def logged_positions(path: str) -> Iterator[Position]:
+    """Every position in a game log where the AI was to move, with its move.
+
+    Games logged without their move order are skipped.
+    """
+    for record in read_games(path):
+        if not record.ordered:
+            continue
+        game = TicTacToe(record.rows, record.cols, record.k)
+        player = "X"
+        for move in record.moves:
+            if player != record.human:
+                text = "".join(c if c != " " else "." for c in game.board)
+                yield text, record.rows, record.cols, record.k, {"played": move, "mode": record.mode}
+            game.push(move, player)
+            player = other_player(player)
+
+
+def analyze_stream(positions: Iterable[Position], budget: Budget = Budget(), workers: int = 1,
+                   chunk_size: int = 256) -> Iterator[Dict[str, object]]:
+    """Analyze ``positions`` in order, keeping at most two chunks per worker in flight."""
+    it = iter(positions)
+    chunks = iter(lambda: list(islice(it, chunk_size)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _analyze_chunk(chunk, budget)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending: Deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_analyze_chunk, chunk, budget))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze tic-tac-toe positions in bulk.")
+    parser.add_argument("files", nargs="*", help="position files (default: stdin)")
+    parser.add_argument("--game-log", help="analyze the AI's decisions in this game log instead")
+    parser.add_argument("--rows", type=int, default=0, help="default rows (default: square boards)")
+    parser.add_argument("--cols", type=int, default=0, help="default cols (default: rows)")
+    parser.add_argument("--k", type=int, default=0, help="default win length (default: the shorter side)")
+    parser.add_argument("--depth", type=int, help="search depth limit per position")
+    parser.add_argument("--time-budget", type=float, help="seconds per position")
+    parser.add_argument("--nodes", type=int, help="search node budget per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=256, help="positions per task")
+    args = parser.parse_args(argv)
+
+    if args.game_log:
+        positions = logged_positions(args.game_log)
+    else:
+        positions = read_positions(fileinput.input(args.files), args.rows, args.cols, args.k)
+    budget = Budget(args.depth, args.time_budget, args.nodes)
+    errors = 0
+    for result in analyze_stream(positions, budget, args.workers, args.chunk_size):
+        errors += "error" in result
+        sys.stdout.write(json.dumps(result, separators=(",", ":")) + "\n")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
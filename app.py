@@ -1,283 +1,149 @@
 from __future__ import annotations
 
-from flask import Flask, jsonify, request, render_template_string, session, redirect
+from flask import Flask, Response, g, jsonify, request, render_template, session, redirect
+import os
+import random
+import threading
 import time
-
-from tictactoe import TicTacToe, minimax_best_move, other_player
-
-
-app = Flask(__name__)
+from itertools import zip_longest
+from typing import Dict, List, Optional, Tuple
+
+from assets import AssetRegistry
+from engines import DIFFICULTIES, ENGINES, choose_move, deterministic, engine_mode, searches, seed_worker
+from gamelog import GameLog, GameRecord
+from games import GameError, ServerGame, create_game_store
+from leaderboard import create_leaderboard
+from mcts import mcts_best_move
+from metrics import GAME_OUTCOMES, REGISTRY, REQUEST_SECONDS, REQUESTS
+from stores import ServerSideSessionInterface, create_stores
+from tictactoe import (
+    Geometry, Player, TicTacToe, board_string, geometry, load_solution_file, other_player, parse_board_string, solved_table,
+)
+
+
+app = Flask(__name__, static_folder=None)
 app.secret_key = "dev-secret-change-me"
 
-
-HOME_HTML = """
-<!doctype html>
-<html>
-  <head>
-    <meta charset=\"utf-8\" />
-    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-    <title>Start • Tic-Tac-Toe AI</title>
-    <style>
-      :root { --primary: #e5e7eb; --accent: #7a2436; --bg: #0b0f1a; --card-bg: #111827; --border: #273244; --text-muted: #9aa4b2; }
-      body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 0; min-height: 100vh; display: grid; place-items: center; background:
-        radial-gradient(900px 420px at 85% -10%, rgba(122,36,54,.14), transparent 60%),
-        radial-gradient(720px 380px at 10% 110%, rgba(122,36,54,.08), transparent 60%),
-        radial-gradient(600px 300px at 0% 100%, rgba(34,197,94,.06), transparent 60%),
-        linear-gradient(180deg, #0b0f1a, #0e1422);
-        color: var(--primary); position: relative; }
-      body::after { content: ""; position: fixed; inset: 0; pointer-events: none; background:
-        radial-gradient(1200px 700px at 50% -10%, rgba(0,0,0,.25), transparent 60%),
-        radial-gradient(1200px 800px at 50% 120%, rgba(0,0,0,.35), transparent 60%); }
-      .card { width: min(520px, 92vw); background: var(--card-bg); border: 1px solid var(--border); border-radius: 14px; padding: 22px; box-shadow: 0 20px 50px rgba(0,0,0,0.45), 0 0 0 1px rgba(122,36,54,.10) inset; }
-      h1 { margin: 6px 0 14px; font-size: 24px; }
-      .row { display:flex; gap: 10px; align-items:center; margin-bottom: 12px; }
-      label { width: 88px; color: var(--text-muted); }
-      input { flex: 1; padding: 10px 12px; border: 1px solid var(--border); border-radius: 10px; background: var(--bg); color: var(--primary); }
-      button { background: linear-gradient(180deg, #7a2436, #5a1c2a); color: #fff; border: 1px solid rgba(255,255,255,.06); padding: 10px 14px; border-radius: 10px; cursor: pointer; box-shadow: 0 12px 28px rgba(122,36,54,.32); transition: transform .12s ease, box-shadow .2s ease, filter .2s ease; min-width: 96px; text-align: center; }
-      button:hover { transform: translateY(-1px); box-shadow: 0 16px 36px rgba(122,36,54,.42); filter: saturate(1.01); }
-      .tile-group { display: flex; gap: 8px; flex-wrap: wrap; }
-      .tile { padding: 10px 16px; border: 2px solid var(--border); border-radius: 10px; background: var(--bg); color: var(--primary); cursor: pointer; transition: all 0.2s ease; text-align: center; min-width: 80px; box-shadow: inset 0 1px 0 rgba(255,255,255,.04); }
-      .tile:hover { border-color: var(--accent); background: var(--card-bg); }
-      .tile.selected { border-color: var(--accent); background: var(--accent); color: white; }
-      .tile input[type="radio"] { display: none; }
-    </style>
-  </head>
-  <body>
-    <form class=\"card\" method=\"post\" action=\"/start\">
-      <h1>Start a Game</h1>
-      <div class=\"row\">
-        <label for=\"player_name\">Your name</label>
-        <input id=\"player_name\" name=\"player_name\" placeholder=\"Player\" value=\"{{ player_name }}\" />
-      </div>
-      <div class=\"row\">
-        <label>You are</label>
-        <div class=\"tile-group\">
-          <label class=\"tile {{ 'selected' if human=='X' else '' }}\">
-            <input type=\"radio\" name=\"human\" value=\"X\" {{ 'checked' if human=='X' else '' }}>
-            X
-          </label>
-          <label class=\"tile {{ 'selected' if human=='O' else '' }}\">
-            <input type=\"radio\" name=\"human\" value=\"O\" {{ 'checked' if human=='O' else '' }}>
-            O
-          </label>
-        </div>
-      </div>
-      <div class=\"row\">
-        <label>Level</label>
-        <div class=\"tile-group\">
-          <label class=\"tile {{ 'selected' if mode=='beginner' else '' }}\">
-            <input type=\"radio\" name=\"mode\" value=\"beginner\" {{ 'checked' if mode=='beginner' else '' }}>
-            Beginner
-          </label>
-          <label class=\"tile {{ 'selected' if mode=='intermediate' else '' }}\">
-            <input type=\"radio\" name=\"mode\" value=\"intermediate\" {{ 'checked' if mode=='intermediate' else '' }}>
-            Intermediate
-          </label>
-          <label class=\"tile {{ 'selected' if mode=='expert' else '' }}\">
-            <input type=\"radio\" name=\"mode\" value=\"expert\" {{ 'checked' if mode=='expert' else '' }}>
-            Expert
-          </label>
-        </div>
-      </div>
-      <button type=\"submit\">Play</button>
-      <script>
-        document.querySelectorAll('.tile-group input[type="radio"]').forEach((input) => {
-          input.addEventListener('change', () => {
-            const name = input.name;
-            document.querySelectorAll(`.tile-group input[name="${name}"]`).forEach((r) => {
-              const tile = r.closest('.tile');
-              if (tile) tile.classList.toggle('selected', r.checked);
-            });
-          });
-        });
-      </script>
-    </form>
-  </body>
-  </html>
-"""
-
-
-GAME_HTML = """
-<!doctype html>
-<html>
-  <head>
-    <meta charset=\"utf-8\" />
-    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-    <title>Tic-Tac-Toe AI</title>
-    <style>
-      :root { --tile: 110px; --gap: 10px; --primary: #e5e7eb; --border: #2c3a52; --accent: #7a2436; --muted: #9aa4b2; --bg: #0b0f1a; --card-bg: #111827; --cell-bg: #1f2a3a; }
-      body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 0; min-height: 100vh; display: grid; place-items: center; color: var(--primary); background:
-        radial-gradient(900px 420px at 85% -10%, rgba(122,36,54,.14), transparent 60%),
-        radial-gradient(720px 380px at 10% 110%, rgba(122,36,54,.08), transparent 60%),
-        radial-gradient(700px 360px at -10% 20%, rgba(34,197,94,.10), transparent 55%),
-        linear-gradient(180deg, #0b0f1a, #0e1422); position: relative; }
-      body::after { content: ""; position: fixed; inset: 0; pointer-events: none; background:
-        radial-gradient(1200px 700px at 50% -10%, rgba(0,0,0,.25), transparent 60%),
-        radial-gradient(1200px 800px at 50% 120%, rgba(0,0,0,.35), transparent 60%);
-        }
-      .container { width: 720px; margin: 0; background: var(--card-bg); border: 1px solid var(--border); border-radius: 0px; padding: 20px; box-shadow: 0 20px 50px rgba(0,0,0,0.45), 0 0 0 1px rgba(122,36,54,.10) inset; }
-      h1 { margin: 0 0 12px; font-size: 26px; display:flex; justify-content: space-between; align-items:center; letter-spacing: .01em; text-shadow: 0 6px 26px rgba(122,36,54,.25), 0 1px 0 rgba(255,255,255,.04); }
-      .controls { display:flex; align-items:center; gap: 12px; margin-bottom: 12px; flex-wrap: wrap; }
-      button, .button { padding: 8px 12px; border-radius: 8px; background: linear-gradient(180deg, #7a2436, #5a1c2a); color: white; border: 1px solid rgba(255,255,255,.06); text-decoration: none; display: inline-flex; align-items: center; justify-content: center; box-shadow: 0 14px 30px rgba(0,0,0,.35), 0 0 0 1px rgba(122,36,54,.18) inset; transition: transform .12s ease, box-shadow .2s ease, filter .2s ease; }
-      .controls button, .controls .button { width: 120px; height: 38px; padding: 0 12px; }
-      button:hover, .button:hover { transform: translateY(-1px); box-shadow: 0 16px 36px rgba(162,59,91,.45); filter: saturate(1.02); }
-      button:disabled { background: #475569; }
-      .tile-group { display: flex; gap: 8px; flex-wrap: wrap; }
-      .tile { padding: 8px 12px; border: 2px solid var(--border); border-radius: 8px; background: var(--bg); color: var(--primary); cursor: pointer; transition: all 0.2s ease; text-align: center; min-width: 60px; }
-      .tile:hover { border-color: var(--accent); background: var(--card-bg); }
-      .tile.selected { border-color: var(--accent); background: var(--accent); color: white; }
-      .tile input[type="radio"] { display: none; }
-      .status { margin: 10px 0 16px; font-weight: 600; color: var(--muted); min-height: 22px; }
-      .board { display: grid; grid-template-columns: repeat(3, var(--tile)); grid-gap: var(--gap); justify-content:center; padding: 10px; border: 1px solid rgba(255,255,255,.04); background: linear-gradient(180deg, rgba(255,255,255,.02), rgba(255,255,255,.01)); filter: drop-shadow(0 24px 40px rgba(0,0,0,.45)); }
-      .cell { width: var(--tile); height: var(--tile); border: 2px solid var(--border); display:flex; align-items:center; justify-content:center; font-size: 56px; cursor: pointer; user-select: none; border-radius: 12px; background: var(--cell-bg); transition: transform .05s ease, box-shadow .2s ease; box-shadow: inset 0 1px 0 rgba(255,255,255,.04); }
-      .cell:hover { transform: translateY(-1px); }
-      .cell.disabled { cursor: not-allowed; color: #8a9bb5; background: #0f172a; }
-      .cell.highlight { background: #14532d; color: #22c55e; border-color: #16a34a; box-shadow: 0 0 0 3px rgba(34,197,94,.15) inset; }
-      .legend { margin-top: 14px; font-size: 13px; color: var(--muted); text-align:center; }
-      .name { font-size: 14px; color: var(--muted); }
-    </style>
-  </head>
-  <body>
-    <div class=\"container\">
-      <h1>
-        Tic-Tac-Toe vs AI
-        <div style=\"display: flex; flex-direction: column; align-items: flex-end; gap: 4px;\">
-          <span class=\"name\">Player: {{ player_name }}</span>
-          <span class=\"name\">Level: <span id=\"levelText\">{{ mode.title() }}</span></span>
-        </div>
-      </h1>
-      <div class=\"controls\">
-        <button id=\"new\">New Game</button>
-        <label class=\"name\" for=\"level\" style=\"margin-left:8px;\">Level</label>
-        <select id=\"level\" class=\"button\" style=\"width:auto; height:38px; background:#0b0f1a; border:1px solid rgba(255,255,255,.06); color:#e5e7eb;\">
-          <option value=\"beginner\" {{ 'selected' if mode=='beginner' else '' }}>Beginner</option>
-          <option value=\"intermediate\" {{ 'selected' if mode=='intermediate' else '' }}>Intermediate</option>
-          <option value=\"expert\" {{ 'selected' if mode=='expert' else '' }}>Expert</option>
-        </select>
-        <a href=\"/start\" class=\"button\">Home</a>
-      </div>
-      <div class=\"status\" id=\"status\"></div>
-      <div class=\"board\" id=\"board\"></div>
-      <div class=\"legend\">Click a square to make your move.</div>
-    </div>
-
-    <script>
-      const boardEl = document.getElementById('board');
-      const statusEl = document.getElementById('status');
-      const newBtn = document.getElementById('new');
-      let resultBtn;
-
-      let board = Array(9).fill(' ');
-      let human = '{{ human }}';
-      let ai = human === 'X' ? 'O' : 'X';
-      let current = 'X';
-      let gameOver = false;
-      let winningLine = [];
-
-      function ensureResultButton() {
-        if (!resultBtn) {
-          const btn = document.createElement('a');
-          btn.href = '#';
-          btn.id = 'resultBtn';
-          btn.className = 'button';
-          btn.style.marginLeft = '8px';
-          btn.textContent = 'View Result';
-          document.querySelector('.controls').appendChild(btn);
-          resultBtn = btn;
-        }
-        resultBtn.style.display = gameOver ? '' : 'none';
-      }
-
-      function getMode() {
-        const sel = document.getElementById('level');
-        return sel ? sel.value : '{{ mode }}';
-      }
-
-      function syncLevelLabel() {
-        const txt = document.getElementById('levelText');
-        if (txt) {
-          const m = getMode();
-          txt.textContent = m.charAt(0).toUpperCase() + m.slice(1);
-        }
-      }
-
-      function render() {
-        boardEl.innerHTML = '';
-        board.forEach((cell, idx) => {
-          const div = document.createElement('div');
-          const disabled = (gameOver || cell !== ' ');
-          const hl = gameOver && winningLine.includes(idx) ? ' highlight' : '';
-          div.className = 'cell' + (disabled ? ' disabled' : '') + hl;
-          div.textContent = cell;
-          div.addEventListener('click', () => onCellClick(idx));
-          boardEl.appendChild(div);
-        });
-        statusEl.textContent = gameOver ? statusEl.textContent : `Turn: ${current}`;
-        ensureResultButton();
-      }
-
-      async function startServerGame() {
-        const mode = getMode();
-        await fetch('/new-game', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ mode }) });
-        syncLevelLabel();
-      }
-
-      async function reset() {
-        board = Array(9).fill(' ');
-        current = 'X';
-        gameOver = false;
-        winningLine = [];
-        human = '{{ human }}';
-        ai = human === 'X' ? 'O' : 'X';
-        await startServerGame();
-        render();
-        if (current === ai) aiMove();
-      }
-
-      async function onCellClick(i) {
-        if (gameOver || current !== human || board[i] !== ' ') return;
-        board[i] = human;
-        current = ai;
-        render();
-        await aiMove();
-      }
-
-      async function aiMove() {
-        if (gameOver) return;
-        const res = await fetch('/ai-move', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ board, current, ai, mode: getMode() }) });
-        const data = await res.json();
-        board = data.board;
-        current = data.next;
-        gameOver = data.gameOver;
-        statusEl.textContent = data.status;
-        winningLine = Array.isArray(data.winningLine) ? data.winningLine : [];
-        if (gameOver) {
-          // keep final board visible and show result button
-          render();
-          if (resultBtn) {
-            const winner = data.status.startsWith('Winner: ') ? data.status.split(': ')[1] : '';
-            const params = new URLSearchParams({ result: winner ? 'win' : 'draw', winner, human, ai });
-            resultBtn.onclick = (e) => { e.preventDefault(); window.location.href = `/result?${params.toString()}`; };
-          }
-          return;
-        }
-        render();
-      }
-
-      newBtn.addEventListener('click', reset);
-      const levelSel = document.getElementById('level');
-      if (levelSel) {
-        levelSel.addEventListener('change', async () => {
-          await startServerGame();
-          await reset();
-        });
-      }
-      // Start first game
-      reset();
-    </script>
-  </body>
-  </html>
-"""
+# CSS and JS are served from memory under content-hashed URLs (see assets.py).
+assets = AssetRegistry(os.path.join(app.root_path, "static"))
+app.jinja_env.globals["asset_url"] = assets.url
+
+TEMPLATES = ("home.html", "game.html", "result.html", "leaderboard.html")
+# Compile the page templates once now rather than on their first request.
+for _template in TEMPLATES:
+    app.jinja_env.get_template(_template)
+
+# Session data and scores live server-side; the cookie only holds a session id.
+# TICTACTOE_STORE picks "memory" (default) or "sqlite" at TICTACTOE_DB.
+session_backend, stats_store = create_stores(
+    os.environ.get("TICTACTOE_STORE", "memory"),
+    os.environ.get("TICTACTOE_DB", "tictactoe.db"),
+)
+app.session_interface = ServerSideSessionInterface(session_backend)
+# The cross-player leaderboard is always persistent, in the same database file.
+leaderboard = create_leaderboard(os.environ.get("TICTACTOE_DB", "tictactoe.db"))
+# Every finished game is appended to a binary log (see gamelog.py).
+game_log = GameLog(os.environ.get("TICTACTOE_GAMELOG", "games.log"))
+
+# Games played through /games live here, keyed by an unguessable id. Like
+# sessions, they need TICTACTOE_STORE=sqlite to be shared between workers.
+games = create_game_store(
+    os.environ.get("TICTACTOE_STORE", "memory"),
+    os.environ.get("TICTACTOE_DB", "tictactoe.db"),
+)
+
+# 3x3 AI moves are table lookups. Map the shared solution file (see
+# build_solution.py) if there is one, otherwise solve the game up front.
+SOLUTION_PATH = os.environ.get("TICTACTOE_SOLUTION", os.path.join(app.root_path, "solution.bin"))
+try:
+    load_solution_file(SOLUTION_PATH)
+except FileNotFoundError:
+    solved_table()
+except (OSError, ValueError) as exc:
+    app.logger.warning("Ignoring solution file: %s", exc)
+    solved_table()
+
+MAX_BOARD_SIDE = 7
+
+# Set once warm_up() has run; /readyz answers 503 until then.
+ready = threading.Event()
+
+
+def warm_up() -> None:
+    """Pay the cold-start costs now instead of on the first requests.
+
+    Builds the geometry tables for every board the app accepts (with the
+    default k) and runs each engine once. In a pre-fork server this runs in
+    the master (see wsgi.py), so the workers share the result copy-on-write.
+    """
+    for rows in range(3, MAX_BOARD_SIDE + 1):
+        for cols in range(3, MAX_BOARD_SIDE + 1):
+            geometry(rows, cols, min(rows, cols))
+    rng = random.Random(0)
+    for mode in DIFFICULTIES:
+        ENGINES[mode](TicTacToe(), "X", rng)
+        ENGINES[mode](TicTacToe(4, 4, 4), "X", rng)
+    mcts_best_move(TicTacToe(), "X", playouts=64, rng=rng, reuse=False)
+    ready.set()
+
+
+def after_fork() -> None:
+    """Give a forked worker its own database connections and random stream."""
+    seed_worker()
+    session_backend.reopen()
+    stats_store.reopen()
+    games.reopen()
+    leaderboard.reopen()
+
+
+def is_integer(value: object) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def board_geometry(payload: dict) -> Geometry:
+    rows = payload.get("rows", 3)
+    cols = payload.get("cols", rows)
+    k = payload.get("k", min(rows, cols) if is_integer(rows) and is_integer(cols) else None)
+    if not (is_integer(rows) and is_integer(cols) and is_integer(k)):
+        raise ValueError("rows, cols and k must be integers")
+    if not (3 <= rows <= MAX_BOARD_SIDE and 3 <= cols <= MAX_BOARD_SIDE):
+        raise ValueError(f"Board sides must be between 3 and {MAX_BOARD_SIDE}")
+    if not 3 <= k <= max(rows, cols):
+        raise ValueError(f"k must be between 3 and {max(rows, cols)}")
+    return geometry(rows, cols, k)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    # Label by route pattern, not path, so game ids don't each get a series.
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    started = g.get("request_started")
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method, mode=g.get("mode", ""))
+    REQUESTS.inc(route=route, method=request.method, status=str(response.status_code))
+    return response
+
+
+@app.get("/healthz")
+def healthz():
+    return jsonify({"ok": True})
+
+
+@app.get("/readyz")
+def readyz():
+    if not ready.is_set():
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True})
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/start")
@@ -285,14 +151,8 @@ def start_page():
     session.setdefault("player_name", "Player")
     session.setdefault("human", "X")
     session.setdefault("mode", "expert")
-    # Initialize per-level stats structure
-    session.setdefault("level_stats", {
-        "beginner": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-        "intermediate": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-        "expert": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-    })
-    return render_template_string(
-        HOME_HTML,
+    return render_template(
+        "home.html",
         player_name=session.get("player_name", "Player"),
         human=session.get("human", "X"),
         mode=session.get("mode", "expert"),
@@ -311,6 +171,11 @@ def start_submit():
     return redirect("/game")
 
 
+@app.get("/static/<path:filename>")
+def static_asset(filename: str):
+    return assets.response(filename, request)
+
+
 @app.get("/")
 def root_redirect():
     return redirect("/start")
@@ -318,465 +183,375 @@ def root_redirect():
 
 @app.get("/game")
 def game_page():
-    # Ensure counters are initialized
-    session.setdefault("human_wins", 0)
-    session.setdefault("ai_wins", 0)
-    session.setdefault("draws", 0)
     session.setdefault("player_name", "Player")
     session.setdefault("human", "X")
     session.setdefault("mode", "expert")
-    session.setdefault("level_stats", {
-        "beginner": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-        "intermediate": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-        "expert": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-    })
-    return render_template_string(
-        GAME_HTML,
+    return render_template(
+        "game.html",
         player_name=session.get("player_name", "Player"),
         human=session.get("human", "X"),
         mode=session.get("mode", "expert"),
     )
 
 
-@app.post("/new-game")
-def new_game():
-    payload = request.get_json(force=True)
-    mode = (payload.get("mode", session.get("mode", "expert")) or "expert").lower()
+def restart_timer(mode: str) -> None:
     session["mode"] = mode
     session["game_started_at"] = time.time()
     # clear any previous frozen duration from last result
     session.pop("last_duration_seconds", None)
-    return jsonify({ "ok": True, "mode": mode })
 
 
-@app.post("/ai-move")
-def ai_move():
+@app.post("/new-game")
+def new_game():
     payload = request.get_json(force=True)
-    board = payload.get("board", [" "] * 9)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    mode = (payload.get("mode", session.get("mode", "expert")) or "expert").lower()
+    g.mode = engine_mode(mode)
+    restart_timer(mode)
+    return jsonify({ "ok": True, "mode": mode })
+
+
+# Protocol versions for /ai-move, chosen by the client with "v" in the payload.
+# v1 (the default) sends boards as lists of " ", "X" and "O" and statuses as
+# text. v2 sends boards as strings ("X...O...." with "." for empty), a
+# numeric status and the winning line as a bit mask, and answers with only
+# what a client needs to redraw:
+#   -> {"v": 2, "board": "X........", "current": "O", "ai": "O", "mode": "expert"}
+#   <- {"v": 2, "board": "X...O....", "next": "X", "status": 0, "line": 0, "move": 4}
+PROTOCOL_VERSIONS = (1, 2)
+PLAYING, X_WON, O_WON, DRAWN = 0, 1, 2, 3
+
+
+def protocol_version(payload: dict) -> int:
+    version = payload.get("v", 1)
+    # True == 1 in Python, so rule out booleans explicitly.
+    if isinstance(version, bool) or version not in PROTOCOL_VERSIONS:
+        raise ValueError(f"Unsupported protocol version {version!r}")
+    return version
+
+
+def read_position(payload: dict, default_mode: str) -> Tuple[TicTacToe, Player, Player, str]:
+    geom = board_geometry(payload)
     current = payload.get("current", "X")
     ai_player = payload.get("ai", "O")
-    mode = (payload.get("mode", session.get("mode", "expert")) or "expert").lower()
+    if current not in ("X", "O") or ai_player not in ("X", "O"):
+        raise ValueError("current and ai must be 'X' or 'O'")
+    mode = (payload.get("mode", default_mode) or "expert").lower()
+
+    game = TicTacToe(geom.rows, geom.cols, geom.k)
+    if protocol_version(payload) == 2:
+        game.x, game.o = parse_board_string(payload.get("board", "." * geom.size), geom.size)
+    else:
+        board = payload.get("board", [" "] * geom.size)
+        game.board = [c if c in ("X", "O") else " " for c in board]
+    return game, current, ai_player, mode
+
+
+def take_ai_turn(game: TicTacToe, current: Player, ai_player: Player, mode: str) -> Tuple[int, Player]:
+    """Play the AI's move in ``game`` if it is its turn and the game is on.
+
+    Returns the move (-1 if the AI did not move) and whose turn is next.
+    """
+    if current != ai_player or game.is_terminal():
+        return -1, current
+    move = choose_move(game, ai_player, mode)
+    if move == -1:
+        return -1, current
+    game.place(move, ai_player)
+    return move, other_player(ai_player)
+
+
+def play_ai_turn(game: TicTacToe, current: Player, ai_player: Player, mode: str, version: int = 1) -> Tuple[dict, int]:
+    """Play the AI's reply to a posted position and build the response body.
+
+    ``game`` is updated in place. Returns the JSON body, in protocol
+    ``version``, and the AI's move, or -1 when the AI did not move.
+    """
+    move, next_turn = take_ai_turn(game, current, ai_player, mode)
+    winner = game._check_winner()
+    game_over = winner is not None or (game.x | game.o) == game.geometry.full_mask
+    line = game.winning_line() if winner is not None else None
+
+    if version == 2:
+        if winner is not None:
+            status = X_WON if winner == "X" else O_WON
+        else:
+            status = DRAWN if game_over else PLAYING
+        line_mask = sum(1 << cell for cell in line) if line else 0
+        board = board_string(game.x, game.o, game.geometry.size)
+        return {"v": 2, "board": board, "next": next_turn, "status": status, "line": line_mask, "move": move}, move
+
+    if winner is not None:
+        status = f"Winner: {winner}"
+    elif game_over:
+        status = "Draw"
+    else:
+        status = f"Turn: {next_turn}"
+    response = {"board": game.board, "next": next_turn, "status": status, "gameOver": game_over}
+    # An echoed position without a move has never carried a winning line.
+    if game_over or move >= 0:
+        response["winningLine"] = list(line or [])
+    return response, move
 
-    game = TicTacToe()
-    game.board = [c if c in ("X", "O") else " " for c in board]
 
+def freeze_duration() -> None:
     # Freeze duration at the exact moment the game ends
-    def freeze_duration():
-        started = session.get("game_started_at")
-        if isinstance(started, (int, float)) and session.get("last_duration_seconds") is None:
-            session["last_duration_seconds"] = int(max(0, time.time() - started))
-
-    # Helper to increment per-level stats in session
-    def inc_level_stat(level: str, key: str):
-        stats = session.get("level_stats") or {}
-        if level not in stats:
-            stats[level] = {"human_wins": 0, "ai_wins": 0, "draws": 0}
-        if key not in stats[level]:
-            stats[level][key] = 0
-        stats[level][key] = int(stats[level][key]) + 1
-        session["level_stats"] = stats
-
-    # If terminal, just return the state and message (and update scores)
+    started = session.get("game_started_at")
+    if isinstance(started, (int, float)) and session.get("last_duration_seconds") is None:
+        session["last_duration_seconds"] = int(max(0, time.time() - started))
+
+
+def record_result(winner: Optional[Player], ai_player: Player, mode: str, ranked: bool = False) -> None:
+    """Count a finished game for the player; ``ranked`` also puts it on the leaderboard.
+
+    Only games the server played out itself (/games) are ranked: /ai-move
+    takes whatever board the client posts, so its results can't be trusted.
+    """
+    human_player = other_player(ai_player)
+    if winner is None:
+        key = "draws"
+    elif winner == human_player:
+        key = "human_wins"
+    elif winner == ai_player:
+        key = "ai_wins"
+    else:
+        return
+    stats_store.increment(session.sid, mode, key)
+    GAME_OUTCOMES.inc(mode=engine_mode(mode), result=key)
+    if ranked:
+        leaderboard.record(
+            session.sid, session.get("player_name", "Player"), engine_mode(mode), key,
+            session.get("last_duration_seconds"),
+        )
+    # Keep the session (and so its id cookie) even if nothing else changed
+    session.modified = True
+
+
+def log_game(moves: List[int], geom: Geometry, human: Player, winner: Optional[Player], mode: str,
+             ordered: bool = True) -> None:
+    game_log.append(GameRecord(
+        tuple(moves), geom.rows, geom.cols, geom.k, human, winner, engine_mode(mode),
+        session.get("last_duration_seconds") or 0, int(time.time()), ordered,
+    ))
+
+
+def final_position_moves(game: TicTacToe) -> List[int]:
+    """The marks on the board as X, O, X, ... in cell order, not the order played.
+
+    /ai-move clients post whole boards and the server keeps nothing between
+    moves, so this is all it knows about a finished game.
+    """
+    geom = game.geometry
+    moves = []
+    for x_move, o_move in zip_longest(geom.moves(game.x), geom.moves(game.o)):
+        moves.append(x_move)
+        if o_move is not None:
+            moves.append(o_move)
+    return moves
+
+
+@app.post("/ai-move")
+def ai_move():
+    payload = request.get_json(force=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        version = protocol_version(payload)
+        game, current, ai_player, mode = read_position(payload, session.get("mode", "expert"))
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    g.mode = engine_mode(mode)
+
+    response, _ = play_ai_turn(game, current, ai_player, mode, version)
     if game.is_terminal():
+        freeze_duration()
         winner = game._check_winner()
-        status = "Draw" if winner is None else f"Winner: {winner}"
-        ai_player = payload.get("ai", "O")
-        human_player = other_player(ai_player)
-        wl = game.winning_line() or []
+        record_result(winner, ai_player, mode)
+        log_game(final_position_moves(game), game.geometry, other_player(ai_player), winner, mode, ordered=False)
+    return jsonify(response)
+
+
+def game_state(game: ServerGame) -> dict:
+    return {
+        "id": game.id,
+        "board": game.game.board,
+        "human": game.human,
+        "ai": game.ai,
+        "mode": game.mode,
+        "next": game.current,
+        "status": game.status(),
+        "gameOver": game.over,
+        "winningLine": list(game.winning_line),
+    }
+
+
+def play_server_ai_turn(game: ServerGame) -> int:
+    """Let the AI move if it is its turn; returns its move or -1."""
+    if game.over or game.current != game.ai:
+        return -1
+    move = choose_move(game.game, game.ai, game.mode)
+    game.play(move, game.ai)
+    return move
+
+
+def save_server_game(game: ServerGame, moves_before: int) -> bool:
+    """Store the moves just played; record the result if they ended the game.
+
+    Returns False, having recorded nothing, if another request got there first.
+    """
+    if not games.save(game, moves_before):
+        return False
+    if game.over and game.moves > moves_before:
         freeze_duration()
-        if winner is None:
-            session["draws"] = session.get("draws", 0) + 1
-            inc_level_stat(mode, "draws")
-        elif winner == human_player:
-            session["human_wins"] = session.get("human_wins", 0) + 1
-            inc_level_stat(mode, "human_wins")
-        elif winner == ai_player:
-            session["ai_wins"] = session.get("ai_wins", 0) + 1
-            inc_level_stat(mode, "ai_wins")
-        return jsonify({
-            "board": game.board,
-            "next": current,
-            "status": status,
-            "gameOver": True,
-            "winningLine": wl,
-        })
+        record_result(game.winner, game.ai, game.mode, ranked=True)
+        log_game(game.history, game.game.geometry, game.human, game.winner, game.mode)
+    return True
 
-    # Ensure it's AI's turn; if not, just echo
-    if current != ai_player:
+
+@app.post("/games")
+def create_game():
+    """Start a game held by the server; the AI opens if the human plays O."""
+    payload = request.get_json(force=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    human = payload.get("human", session.get("human", "X"))
+    if human not in ("X", "O"):
+        return jsonify({"error": "human must be 'X' or 'O'"}), 400
+    mode = (payload.get("mode", session.get("mode", "expert")) or "expert").lower()
+    g.mode = engine_mode(mode)
+    try:
+        geom = board_geometry(payload)
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    restart_timer(mode)
+    game = games.create(session.sid, geom, human, mode)
+    with game.lock:
+        move = play_server_ai_turn(game)
+        save_server_game(game, 0)
+        response = game_state(game)
+    response["move"] = move
+    return jsonify(response), 201
+
+
+@app.get("/games/<game_id>")
+def get_game(game_id: str):
+    game = games.get(game_id, session.sid)
+    if game is None:
+        return jsonify({"error": "Unknown game"}), 404
+    with game.lock:
+        return jsonify(game_state(game))
+
+
+@app.post("/games/<game_id>/move")
+def game_move(game_id: str):
+    """Play the human's ``cell`` and answer with the AI's reply.
+
+    The response only carries what changed: the AI's ``move`` (-1 if it did
+    not move), whose turn is next, the status and the winning line.
+    """
+    game = games.get(game_id, session.sid)
+    if game is None:
+        return jsonify({"error": "Unknown game"}), 404
+    g.mode = engine_mode(game.mode)
+    payload = request.get_json(force=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    cell = payload.get("cell")
+    if not isinstance(cell, int) or isinstance(cell, bool):
+        return jsonify({"error": "cell must be an integer"}), 400
+    size = game.game.geometry.size
+    if not 0 <= cell < size:
+        return jsonify({"error": f"cell must be in range 0..{size - 1}"}), 400
+    with game.lock:
+        moves_before = game.moves
+        try:
+            game.play(cell, game.human)
+        except GameError as exc:
+            return jsonify({"error": str(exc), **game_state(game)}), 409
+        move = play_server_ai_turn(game)
+        if not save_server_game(game, moves_before):
+            # Answer with the stored game so the client can pick up from there.
+            stored = games.get(game_id, session.sid)
+            if stored is None:
+                return jsonify({"error": "Unknown game"}), 404
+            return jsonify({"error": "The game was changed by another request", **game_state(stored)}), 409
         return jsonify({
-            "board": game.board,
-            "next": current,
-            "status": f"Turn: {current}",
-            "gameOver": False,
+            "move": move,
+            "next": game.current,
+            "status": game.status(),
+            "gameOver": game.over,
+            "winningLine": list(game.winning_line),
         })
 
-    # Compute move based on mode
-    move = -1
-    num_marks = sum(1 for c in game.board if c != " ")
-    is_ai_first_move = (num_marks == 0) or (num_marks == 1 and current == ai_player)
-
-    if mode == "beginner":
-        import random
-        if is_ai_first_move:
-            edges = [i for i in [1,3,5,7] if game.board[i] == " "]
-            if edges:
-                move = random.choice(edges)
-        if move == -1:
-            # beginner picks randomly among available moves
-            avail = game.available_moves()
-            if avail:
-                move = random.choice(avail)
-    elif mode == "intermediate":
-        human_player = other_player(ai_player)
-        if is_ai_first_move:
-            edges = [i for i in [1,3,5,7] if game.board[i] == " "]
-            if edges:
-                move = edges[0]
-        if move == -1:
-            # Try to block any immediate human win
-            for i in game.available_moves():
-                test_state = game.clone()
-                test_state.make_move(i, human_player)
-                if test_state._check_winner() == human_player:
-                    move = i
-                    break
-        if move == -1:
-            move = minimax_best_move(game, current_player=ai_player, ai_player=ai_player)
-    else:  # expert
-        move = minimax_best_move(game, current_player=ai_player, ai_player=ai_player)
-
-    if move == -1:  # no move
-        status = "Draw"
-        wl = game.winning_line() or []
-        freeze_duration()
-        return jsonify({"board": game.board, "next": current, "status": status, "gameOver": True, "winningLine": wl})
-
-    result = game.make_move(move, ai_player)
-    if result.winner:
-        status = f"Winner: {result.winner}"
-        game_over = True
-        next_turn = other_player(ai_player)
-        human_player = other_player(ai_player)
-        if result.winner == human_player:
-            session["human_wins"] = session.get("human_wins", 0) + 1
-            # per-level
-            stats = session.get("level_stats") or {}
-            stats.setdefault(mode, {"human_wins": 0, "ai_wins": 0, "draws": 0})
-            stats[mode]["human_wins"] = int(stats[mode].get("human_wins", 0)) + 1
-            session["level_stats"] = stats
-        else:
-            session["ai_wins"] = session.get("ai_wins", 0) + 1
-            stats = session.get("level_stats") or {}
-            stats.setdefault(mode, {"human_wins": 0, "ai_wins": 0, "draws": 0})
-            stats[mode]["ai_wins"] = int(stats[mode].get("ai_wins", 0)) + 1
-            session["level_stats"] = stats
-    elif result.is_draw:
-        status = "Draw"
-        game_over = True
-        next_turn = other_player(ai_player)
-        session["draws"] = session.get("draws", 0) + 1
-        stats = session.get("level_stats") or {}
-        stats.setdefault(mode, {"human_wins": 0, "ai_wins": 0, "draws": 0})
-        stats[mode]["draws"] = int(stats[mode].get("draws", 0)) + 1
-        session["level_stats"] = stats
-    else:
-        status = f"Turn: {other_player(ai_player)}"
-        game_over = False
-        next_turn = other_player(ai_player)
 
-    if game_over:
-        freeze_duration()
+MAX_BATCH_ITEMS = 10_000
+# Items that need a search (boards larger than 3x3, MCTS) are bounded per
+# batch by count and by time; past either, they get an error instead.
+MAX_BATCH_SEARCHES = 16
+BATCH_TIME_BUDGET = 2.0  # seconds
+
+
+@app.post("/ai-move/batch")
+def ai_move_batch():
+    """Answer many /ai-move positions in one round trip.
 
-    return jsonify({
-        "board": result.board,
-        "next": next_turn,
-        "status": status,
-        "gameOver": game_over,
-        "winningLine": (game.winning_line() or []) if game_over else [],
-    })
-
-
-RESULT_HTML = """
-<!doctype html>
-<html>
-  <head>
-    <meta charset=\"utf-8\" />
-    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-    <title>Game Result</title>
-    <style>
-      :root { --win: #22c55e; --loss: #ef4444; --draw: #9aa4b2; --card: #0b0f1a; --bg: #0b0f1a; --accent: #7a2436; --border: #273244; --text-muted: #9aa4b2; --glow:#7a2436; }
-      body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 0; min-height: 100vh; display: grid; place-items: center; color: #e5e7eb; background:
-        radial-gradient(1100px 520px at 80% -20%, rgba(122,36,54,.20), transparent 60%),
-        radial-gradient(900px 480px at -10% 20%, rgba(34,197,94,.12), transparent 55%),
-        linear-gradient(180deg, #0b0f1a, #0e1422); position: relative; }
-      body::after { content: ""; position: fixed; inset: 0; pointer-events: none; background:
-        radial-gradient(1200px 700px at 50% -10%, rgba(0,0,0,.25), transparent 60%),
-        radial-gradient(1200px 800px at 50% 120%, rgba(0,0,0,.35), transparent 60%); }
-      .card { width: min(720px, 94vw); background: linear-gradient(180deg, rgba(255,255,255,.02), rgba(255,255,255,.01)); border: 1px solid var(--border); border-radius: 18px; padding: 28px 22px; box-shadow: 0 24px 70px rgba(0,0,0,0.5), 0 0 0 1px rgba(122,36,54,.12) inset; text-align: center; position: relative; overflow: hidden; backdrop-filter: blur(8px); }
-      .card:before { content: ""; position: absolute; inset: -2px; border-radius: 20px; padding: 1px; background: linear-gradient(120deg, rgba(96,165,250,.45), rgba(34,197,94,.35), rgba(99,102,241,.35)); -webkit-mask: linear-gradient(#000 0 0) content-box, linear-gradient(#000 0 0); -webkit-mask-composite: xor; mask-composite: exclude; pointer-events: none; }
-      h1 { margin: 10px 0 8px; font-size: 30px; font-weight: 800; background: linear-gradient(90deg, #fff, #c7d2fe, #93c5fd); -webkit-background-clip: text; background-clip: text; color: transparent; animation: shine 6s linear infinite; letter-spacing: .02em; }
-      @keyframes shine { 0% { filter: drop-shadow(0 0 0 rgba(96,165,250,0)); } 50% { filter: drop-shadow(0 0 18px rgba(96,165,250,.25)); } 100% { filter: drop-shadow(0 0 0 rgba(96,165,250,0)); } }
-      .sub { color: var(--text-muted); margin-bottom: 18px; }
-      .tile-group { display: flex; gap: 10px; flex-wrap: wrap; justify-content: center; margin-bottom: 18px; }
-      .tile { display:inline-block; padding: 9px 14px; font-weight: 700; border-radius: 999px; font-size: 12px; border: 1px solid; transition: transform .15s ease, background .2s ease, border-color .2s ease; letter-spacing: .04em; text-transform: uppercase; }
-      .tile:hover { transform: translateY(-1px); }
-      .tile.win { background: rgba(34,197,94,.12); color: var(--win); border-color: rgba(34,197,94,.35); box-shadow: 0 0 0 3px rgba(34,197,94,.08) inset; }
-      .tile.loss { background: rgba(239,68,68,.12); color: var(--loss); border-color: rgba(239,68,68,.35); box-shadow: 0 0 0 3px rgba(239,68,68,.08) inset; }
-      .tile.draw { background: rgba(148,163,184,.12); color: var(--draw); border-color: rgba(148,163,184,.35); box-shadow: 0 0 0 3px rgba(148,163,184,.08) inset; }
-      .scores { display:grid; grid-template-columns: repeat(3,1fr); gap: 14px; margin: 16px 0 20px; }
-      .score-card { border: 1px solid var(--border); border-radius: 14px; padding: 14px; background: linear-gradient(180deg, #0f172a, #0b1220); box-shadow: 0 8px 24px rgba(0,0,0,.25), 0 1px 0 rgba(255,255,255,.04) inset; }
-      .score-title { font-size: 11px; color: var(--text-muted); margin-bottom: 6px; text-transform: uppercase; letter-spacing: .12em; }
-      .score-value { font-size: 24px; font-weight: 800; }
-      a.button { display: inline-block; padding: 11px 16px; background: linear-gradient(180deg, #7a2436, #5a1c2a); color: #fff; text-decoration: none; border-radius: 12px; box-shadow: 0 14px 30px rgba(0,0,0,.35), 0 0 0 1px rgba(122,36,54,.18) inset; transition: transform .12s ease, box-shadow .2s ease, filter .2s ease; border: 1px solid rgba(255,255,255,.06); }
-      a.button:hover { transform: translateY(-1px); box-shadow: 0 18px 38px rgba(0,0,0,.45); filter: saturate(1.01); }
-      .confetti { position: absolute; top: 0; left: 0; width: 100%; height: 100%; pointer-events: none; overflow: hidden; z-index: 999; }
-      .confetti span { position: absolute; top: -20px; width: 10px; height: 14px; opacity: 1; animation: fall linear forwards; border-radius: 3px; }
-      @keyframes fall { 0% { transform: translateY(-10vh) rotate(0deg); opacity: 1; } 100% { transform: translateY(110vh) rotate(720deg); opacity: 1; } }
-      .row { margin-bottom: 10px; }
-      .time-panel { border:1px solid var(--border); background: linear-gradient(180deg, #0f172a, #0b1220); border-radius:14px; padding:12px; margin: 12px auto 16px; text-align:left; box-shadow: 0 10px 30px rgba(0,0,0,.35), 0 1px 0 rgba(255,255,255,.04) inset; }
-      .time-flex { display:flex; align-items:center; justify-content:space-between; gap:10px; }
-      .time-value { font-size:22px; font-weight:800; }
-      .time-best { font-size:13px; color: var(--text-muted); }
-      .bar { height:10px; background: #1f2b3f; border-radius:999px; overflow:hidden; margin-top:8px; box-shadow: inset 0 1px 0 rgba(255,255,255,.05); }
-      .bar > div { height:100%; background: linear-gradient(90deg, #7a2436, #5a1c2a); width:0; transition: width .9s ease; box-shadow: 0 0 12px rgba(122,36,54,.55); }
-      .trophy { width: 54px; height: 54px; margin: 0 auto 6px; display: grid; place-items: center; filter: drop-shadow(0 6px 20px rgba(234,179,8,.2)); }
-    </style>
-  </head>
-  <body>
-    <div class="card">
-      <div class="trophy" aria-hidden="true">
-        <svg width="44" height="44" viewBox="0 0 24 24" fill="none" xmlns="http://www.w3.org/2000/svg">
-          <path d="M7 4h10a0 0 0 0 1 0 0v3a5 5 0 0 1-10 0V4a0 0 0 0 1 0 0Z" fill="#f59e0b"/>
-          <path d="M17 4h3a2 2 0 0 1-2 3h-1V4Z" fill="#f59e0b"/>
-          <path d="M7 4H4a2 2 0 0 0 2 3h1V4Z" fill="#f59e0b"/>
-          <rect x="9" y="13" width="6" height="2" rx="1" fill="#fde68a"/>
-          <rect x="8" y="16" width="8" height="2" rx="1" fill="#fde68a"/>
-        </svg>
-      </div>
-
-      <h1>Game Complete!</h1>
-      <div class="tile-group" style="margin-top:8px; margin-bottom:10px;">
-        <div id="resultPill" class="tile draw" style="border-radius:999px; padding:6px 12px; font-size:12px;">Game Over</div>
-      </div>
-      <div class="sub" id="subtitle">Congratulations {{ player_name }}!</div>
-
-      <div class="stats" style="display:grid; grid-template-columns: repeat(3,1fr); gap:14px; max-width:640px; margin: 0 auto 16px;">
-        <div class="score-card">
-          <div class="score-title">Attempts</div>
-          <div class="score-value" id="attemptsValue">0</div>
-          <div class="score-sub" style="font-size:12px; color: var(--text-muted); margin-top:6px;">Session total</div>
-        </div>
-        <div class="score-card">
-          <div class="score-title">Time</div>
-          <div class="score-value" id="timePretty">{{ duration_seconds }}s</div>
-          <div class="score-sub" style="font-size:12px; color: var(--text-muted); margin-top:6px;"></div>
-        </div>
-        <div class="score-card">
-          <div class="score-title">Result</div>
-          <div class="score-value" id="resultValue">—</div>
-          <div class="score-sub" style="font-size:12px; color: var(--text-muted); margin-top:6px;">Level: {{ mode }}</div>
-        </div>
-      </div>
-
-      <div class="time-panel">
-        <div class="time-flex">
-          <div class="time-value">Your time: {{ duration_seconds }}s</div>
-          <div class="time-best">Best: {{ best_time_seconds }}s</div>
-        </div>
-        <div class="bar"><div id="timeBar"></div></div>
-      </div>
-
-      <div class="scores" style="margin-top:18px;">
-        <div class="score-card">
-          <div class="score-title">You (wins)</div>
-          <div class="score-value">{{ human_wins }}</div>
-        </div>
-        <div class="score-card">
-          <div class="score-title">AI (wins)</div>
-          <div class="score-value">{{ ai_wins }}</div>
-        </div>
-        <div class="score-card">
-          <div class="score-title">Draws</div>
-          <div class="score-value">{{ draws }}</div>
-        </div>
-      </div>
-
-      <div style="margin: 12px 0 6px; font-weight:700; color:#cbd5e1;">By Level</div>
-      <div class="scores">
-        <div class="score-card">
-          <div class="score-title">Beginner</div>
-          <div style="display:flex; justify-content:space-between; color:#cbd5e1; font-weight:700;">
-            <span>Wins: {{ level_stats['beginner']['human_wins'] }}</span>
-            <span>Losses: {{ level_stats['beginner']['ai_wins'] }}</span>
-            <span>Draws: {{ level_stats['beginner']['draws'] }}</span>
-          </div>
-        </div>
-        <div class="score-card">
-          <div class="score-title">Intermediate</div>
-          <div style="display:flex; justify-content:space-between; color:#cbd5e1; font-weight:700;">
-            <span>Wins: {{ level_stats['intermediate']['human_wins'] }}</span>
-            <span>Losses: {{ level_stats['intermediate']['ai_wins'] }}</span>
-            <span>Draws: {{ level_stats['intermediate']['draws'] }}</span>
-          </div>
-        </div>
-        <div class="score-card">
-          <div class="score-title">Expert</div>
-          <div style="display:flex; justify-content:space-between; color:#cbd5e1; font-weight:700;">
-            <span>Wins: {{ level_stats['expert']['human_wins'] }}</span>
-            <span>Losses: {{ level_stats['expert']['ai_wins'] }}</span>
-            <span>Draws: {{ level_stats['expert']['draws'] }}</span>
-          </div>
-        </div>
-      </div>
-
-      <div id="achievementsHeader" style="margin: 12px 0 8px; font-weight:700; color:#cbd5e1;">Achievements Unlocked!</div>
-      <div id="achievementsGrid" class="scores" style="grid-template-columns: repeat(2,1fr);">
-        <div class="score-card" id="achieve1">
-          <div class="score-title">Perfect Solver! 🏆</div>
-          <div style="font-size:13px; color:#cbd5e1;">Blazing fast finish!</div>
-        </div>
-        <div class="score-card" id="achieve2">
-          <div class="score-title">Pure Logic! 🧠</div>
-          <div style="font-size:13px; color:#cbd5e1;">Outsmarted the AI.</div>
-        </div>
-      </div>
-
-      <div class="tile-group" id="extraBadges" style="margin-top:14px"></div>
-      <div style="margin-top:10px">
-        <a class="button" href="/game">Play Again</a>
-        <a class="button" id="shareBtn" style="margin-left:8px">Share Result</a>
-        <a class="button" href="/start" style="margin-left:8px">Home</a>
-      </div>
-      <!-- Confetti disabled to remove colored line artifact on some displays -->
-      <!-- <div id="confetti" class="confetti"></div> -->
-    </div>
-    <script>
-      const params = new URLSearchParams(window.location.search);
-      const result = params.get('result');
-      const winner = params.get('winner');
-      const human = params.get('human');
-      const ai = params.get('ai');
-      const title = document.getElementById('title');
-      const subtitle = document.getElementById('subtitle');
-      const badge = document.getElementById('resultPill');
-      // visual elements
-      const confetti = document.getElementById('confetti');
-      const extra = document.getElementById('extraBadges');
-      const timeBar = document.getElementById('timeBar');
-      const attemptsValue = document.getElementById('attemptsValue');
-      const timePretty = document.getElementById('timePretty');
-      const resultValue = document.getElementById('resultValue');
-      const shareBtn = document.getElementById('shareBtn');
-      const achievementsHeader = document.getElementById('achievementsHeader');
-      const achievementsGrid = document.getElementById('achievementsGrid');
-
-      function setAchievementsVisible(show) {
-        if (!achievementsHeader || !achievementsGrid) return;
-        achievementsHeader.style.display = show ? '' : 'none';
-        achievementsGrid.style.display = show ? '' : 'none';
-      }
-
-      function addBadge(text, cls='draw') {
-        const b = document.createElement('div');
-        b.className = `tile ${cls}`;
-        b.textContent = text;
-        extra.appendChild(b);
-      }
-
-      function makeConfetti() {
-        return; // disabled
-        const colors = ['#fbbf24','#34d399','#60a5fa','#f472b6','#f97316','#a78bfa'];
-        const count = 120;
-        for (let i=0;i<count;i++) {
-          const piece = document.createElement('span');
-          const left = Math.random()*100;
-          const delay = Math.random()*0.7;
-          const dur = 1.8 + Math.random()*1.6;
-          const col = colors[Math.floor(Math.random()*colors.length)];
-          piece.style.left = left + '%';
-          piece.style.background = col;
-          piece.style.transform = `translateY(-10vh) rotate(${Math.random()*360}deg)`;
-          piece.style.animationDuration = dur + 's';
-          piece.style.animationDelay = delay + 's';
-          if (confetti) confetti.appendChild(piece);
-        }
-        // Force a repaint to start animations in some browsers
-        // by reading offsetHeight after appending
-        if (confetti) void confetti.offsetHeight;
-      }
-
-      // pretty time (m:ss)
-      function formatTime(sec){ const m = Math.floor(sec/60); const s = (sec%60).toString().padStart(2,'0'); return m>0? `${m}:${s}` : `${sec}s`; }
-
-      if (result === 'draw') {
-        document.title = 'Game Complete • Draw';
-        subtitle.textContent = `You (${human}) vs AI (${ai})`;
-        badge.textContent = 'Draw';
-        badge.className = 'tile draw';
-        resultValue.textContent = 'Draw';
-      } else if (winner) {
-        const youWon = winner === human;
-        document.title = youWon ? 'Game Complete • Victory' : 'Game Complete • Defeat';
-        subtitle.textContent = youWon ? `Congratulations {{ player_name }}!` : `Good try, {{ player_name }}!`;
-        resultValue.textContent = youWon ? 'Win' : 'Loss';
-        if (youWon) {
-          badge.textContent = 'Perfect! 🏆';
-          badge.className = 'tile win';
-          makeConfetti();
-          setAchievementsVisible(true);
-        } else {
-          badge.textContent = 'Defeat';
-          badge.className = 'tile loss';
-          setAchievementsVisible(false);
-        }
-      } else {
-        document.title = 'Game Complete';
-        subtitle.textContent = `You (${human}) vs AI (${ai})`;
-        badge.textContent = 'Game Over';
-        badge.className = 'tile draw';
-        setAchievementsVisible(true);
-      }
-
-      // Time-based badges from server-injected seconds
-      const durationSeconds = {{ duration_seconds }};
-      const bestTime = {{ best_time_seconds }};
-      const personalBest = {{ 'true' if personal_best else 'false' }};
-      // Progress bar scales to 120s baseline and caps at 100%
-      const pct = Math.min(100, Math.round((durationSeconds/120)*100));
-      requestAnimationFrame(() => { timeBar.style.width = pct + '%'; });
-      timePretty.textContent = formatTime(durationSeconds);
-      attemptsValue.textContent = {{ human_wins }} + {{ ai_wins }} + {{ draws }};
-      if (durationSeconds <= 10) addBadge('Quick Game', 'win');
-      if (durationSeconds >= 60) addBadge('Marathon', 'draw');
-      if (personalBest) addBadge('New Personal Best', 'win');
-
-      if (shareBtn) {
-        shareBtn.addEventListener('click', async () => {
-          try {
-            await navigator.clipboard.writeText(window.location.href);
-            shareBtn.textContent = 'Link Copied!';
-            setTimeout(() => shareBtn.textContent = 'Share Result', 1200);
-          } catch (e) {
-            alert('Link: ' + window.location.href);
-          }
-        });
-      }
-    </script>
-  </body>
-  </html>
-"""
+    Accepts ``{"items": [...]}`` (or a bare list) of /ai-move payloads and
+    returns ``{"results": [...]}`` in the same order, each in its item's
+    protocol version and with the AI's ``move`` added. Items never touch
+    the session's scores. Identical positions in deterministic modes are
+    only searched once, and at most ``MAX_BATCH_SEARCHES`` searches run
+    within ``BATCH_TIME_BUDGET``.
+    """
+    payload = request.get_json(force=True)
+    items = payload.get("items") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return jsonify({"error": "Expected a list of items"}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"At most {MAX_BATCH_ITEMS} items per batch"}), 413
+
+    default_mode = session.get("mode", "expert")
+    seen: Dict[tuple, dict] = {}
+    results = []
+    search_count = 0
+    deadline = time.perf_counter() + BATCH_TIME_BUDGET
+    for item in items:
+        if not isinstance(item, dict):
+            results.append({"error": "Item must be an object"})
+            continue
+        try:
+            version = protocol_version(item)
+            game, current, ai_player, mode = read_position(item, default_mode)
+        except (TypeError, ValueError) as exc:
+            results.append({"error": str(exc)})
+            continue
+        key = None
+        if deterministic(mode):  # random modes give every item its own roll
+            key = (game.geometry, game.x, game.o, current, ai_player, mode, version)
+            if key in seen:
+                results.append(seen[key])
+                continue
+        if searches(game.geometry, mode) and current == ai_player and not game.is_terminal():
+            search_count += 1
+            if search_count > MAX_BATCH_SEARCHES or time.perf_counter() > deadline:
+                results.append({"error": "Search budget for this batch is used up"})
+                continue
+        response, move = play_ai_turn(game, current, ai_player, mode, version)
+        response["move"] = move
+        if key is not None:
+            seen[key] = response
+        results.append(response)
+    return jsonify({"results": results})
 
 
 @app.get("/result")
 def result_page():
-    human_wins = session.get("human_wins", 0)
-    ai_wins = session.get("ai_wins", 0)
-    draws = session.get("draws", 0)
-    level_stats = session.get("level_stats", {
-        "beginner": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-        "intermediate": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-        "expert": {"human_wins": 0, "ai_wins": 0, "draws": 0},
-    })
+    g.mode = engine_mode(session.get("mode", "expert"))
+    level_stats = stats_store.level_stats(session.sid)
+    human_wins = sum(level["human_wins"] for level in level_stats.values())
+    ai_wins = sum(level["ai_wins"] for level in level_stats.values())
+    draws = sum(level["draws"] for level in level_stats.values())
     started = session.get("game_started_at")
     # If we've already frozen a duration for this completed game, reuse it.
     frozen = session.get("last_duration_seconds")
@@ -796,8 +571,8 @@ def result_page():
         personal_best = True
     if best_time_seconds is None:
         best_time_seconds = duration_seconds
-    return render_template_string(
-        RESULT_HTML,
+    return render_template(
+        "result.html",
         human_wins=human_wins,
         ai_wins=ai_wins,
         draws=draws,
@@ -810,8 +585,26 @@ def result_page():
     )
 
 
+LEADERBOARD_SIZE = 20
+
+
+@app.get("/leaderboard")
+def leaderboard_page():
+    mode = request.args.get("mode")
+    if mode not in ENGINES:
+        mode = None
+    g.mode = mode or ""
+    return render_template(
+        "leaderboard.html",
+        mode=mode,
+        modes=list(ENGINES),
+        standings=leaderboard.top(mode, LEADERBOARD_SIZE),
+        totals=leaderboard.mode_totals(),
+    )
+
+
 if __name__ == "__main__":
+    warm_up()
     app.run(host="0.0.0.0", port=5000, debug=True)
 
 
-
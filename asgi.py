@@ -0,0 +1,246 @@
+"""ASGI entry point: serve the Flask app from an async server.
+
+Run with any ASGI server, for example::
+
+    uvicorn asgi:application --workers 1
+
+Each request is turned into a WSGI call. The call runs on one of two thread
+pools, chosen by route. Routes that can search (``/ai-move``,
+``/ai-move/batch`` and the ``/games`` API) get a small pool, and everything
+else gets its own, so ``/new-game``, pages and static files never queue
+behind searches. The searches themselves (boards larger than 3x3) run in a
+bounded process pool, which keeps them from holding the GIL that the other
+requests need. Each move goes to whichever pool process is free, so MCTS
+rarely finds the tree it kept for a game and mostly searches from scratch.
+
+``/games/socket`` is a WebSocket for the game page. After the handshake,
+each move and reply is a few bytes of JSON on the open connection instead
+of a new HTTP request with headers and cookie::
+
+    -> {"new": {"mode": "expert", "human": "X", "rows": 3}}   like POST /games
+    <- {"id": "...", "board": [...], "move": -1, ...}
+    -> {"id": "...", "cell": 4}                               like POST /games/<id>/move
+    <- {"move": 0, "next": "X", "status": "Turn: X", ...}
+
+Each message runs the matching ``/games`` endpoint of the Flask app with the
+connection's session cookie, so both paths share one implementation; errors
+come back with their HTTP status as ``"code"``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import engines
+from app import app as flask_app, warm_up
+
+
+SEARCH_PATHS = ("/ai-move", "/games")
+SOCKET_PATH = "/games/socket"
+GAME_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class WsgiBridge:
+    """Minimal ASGI-to-WSGI adapter with separate pools for search routes."""
+
+    def __init__(
+        self,
+        wsgi_app: Callable,
+        search_workers: Optional[int] = None,
+        light_threads: int = 32,
+        search_paths: Tuple[str, ...] = SEARCH_PATHS,
+        on_startup: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.wsgi_app = wsgi_app
+        self.on_startup = on_startup
+        self.search_paths = search_paths
+        self.search_workers = search_workers or os.cpu_count() or 1
+        self.light_pool = ThreadPoolExecutor(light_threads, thread_name_prefix="light")
+        # Search-route threads mostly wait on the process pool; a couple per
+        # worker process keeps it busy without letting requests pile up there.
+        self.search_pool = ThreadPoolExecutor(2 * self.search_workers, thread_name_prefix="search")
+        self.engine_pool = ProcessPoolExecutor(self.search_workers, initializer=engines.seed_worker)
+        engines.set_search_executor(self.engine_pool)
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.on_startup is not None:
+                    await asyncio.get_running_loop().run_in_executor(self.light_pool, self.on_startup)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def close(self) -> None:
+        engines.set_search_executor(None)
+        self.engine_pool.shutdown(wait=False, cancel_futures=True)
+        self.search_pool.shutdown(wait=False)
+        self.light_pool.shutdown(wait=False)
+
+    async def _http(self, scope: dict, receive: Callable, send: Callable) -> None:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        environ = self._environ(scope, b"".join(chunks))
+        pool = self.search_pool if scope["path"].startswith(self.search_paths) else self.light_pool
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(pool, self._call_wsgi, environ)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _websocket(self, scope: dict, receive: Callable, send: Callable) -> None:
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        if scope["path"] != SOCKET_PATH or not self._same_origin(scope):
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        await send({"type": "websocket.accept"})
+        # The session cookie from the handshake; a reply may replace it when
+        # the first request of a session creates one.
+        headers = [(name, value) for name, value in scope.get("headers", []) if name == b"cookie"]
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            text = message.get("text")
+            if text is None:
+                text = (message.get("bytes") or b"").decode("utf-8", "replace")
+            method_path_body = self._socket_request(text)
+            if method_path_body is None:
+                reply = {"error": "Expected {\"new\": {...}} or {\"id\": ..., \"cell\": n}", "code": 400}
+            else:
+                method, path, body = method_path_body
+                scheme = "https" if scope.get("scheme") == "wss" else "http"
+                request_scope = dict(scope, type="http", scheme=scheme, method=method, path=path, query_string=b"",
+                                     headers=headers + [(b"content-type", b"application/json")])
+                environ = self._environ(request_scope, body)
+                status, response_headers, response_body = await loop.run_in_executor(
+                    self.search_pool, self._call_wsgi, environ
+                )
+                for name, value in response_headers:
+                    if name == b"set-cookie":
+                        headers = [(b"cookie", value.split(b";", 1)[0])]
+                try:
+                    reply = json.loads(response_body)
+                except ValueError:  # an HTML error page
+                    reply = {"error": "Request failed"}
+                if status >= 400:
+                    reply["code"] = status
+            await send({"type": "websocket.send", "text": json.dumps(reply, separators=(",", ":"))})
+
+    @staticmethod
+    def _same_origin(scope: dict) -> bool:
+        """Whether the handshake came from one of our own pages.
+
+        Browsers send the session cookie with a WebSocket handshake from any
+        site, so other origins are turned away. Clients that send no Origin
+        are not browsers and carry no one else's cookie.
+        """
+        headers = dict(scope.get("headers", []))
+        origin = headers.get(b"origin")
+        if origin is None:
+            return True
+        host = headers.get(b"host", b"").decode("latin-1").lower()
+        return bool(host) and urlsplit(origin.decode("latin-1")).netloc.lower() == host
+
+    @staticmethod
+    def _socket_request(text: str) -> Optional[Tuple[str, str, bytes]]:
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(message, dict):
+            return None
+        if isinstance(message.get("new"), dict):
+            return "POST", "/games", json.dumps(message["new"]).encode()
+        game_id = message.get("id")
+        if isinstance(game_id, str) and GAME_ID.fullmatch(game_id) and "cell" in message:
+            return "POST", f"/games/{game_id}/move", json.dumps({"cell": message["cell"]}).encode()
+        return None
+
+    def _call_wsgi(self, environ: dict) -> Tuple[int, Headers, bytes]:
+        response: dict = {}
+        written: List[bytes] = []
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None) -> Callable:
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+            return written.append
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            written.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], b"".join(written)
+
+    @staticmethod
+    def _environ(scope: dict, body: bytes) -> dict:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0],
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper().replace("-", "_")
+            value = raw_value.decode("latin-1")
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+                continue
+            if name == "CONTENT_LENGTH":
+                continue
+            key = f"HTTP_{name}"
+            if key in environ:
+                separator = "; " if key == "HTTP_COOKIE" else ","
+                value = environ[key] + separator + value
+            environ[key] = value
+        return environ
+
+
+application = WsgiBridge(flask_app, on_startup=warm_up)
@@ -0,0 +1,107 @@
+"""Static assets served from memory with content-hashed, cacheable URLs.
+
+Every file in the static folder is read once at startup. Its URL embeds a hash
+of the content (``game.3f9a0c1b2d4e.js``), so the response can be cached for a
+year and a new deploy still changes the URL. Gzip variants, and Brotli ones
+when the ``brotli`` package is installed, are compressed up front.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from flask import Request, Response, abort
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+
+@dataclass
+class Asset:
+    name: str
+    hashed_name: str
+    etag: str
+    mimetype: str
+    body: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+
+class AssetRegistry:
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+        self._by_name: Dict[str, Asset] = {}
+        self._by_hashed_name: Dict[str, Asset] = {}
+        self.load()
+
+    def load(self) -> None:
+        by_name = {}
+        for root, _, files in os.walk(self.folder):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.folder).replace(os.sep, "/")
+                with open(path, "rb") as fh:
+                    by_name[name] = _build_asset(name, fh.read())
+        self._by_name = by_name
+        self._by_hashed_name = {asset.hashed_name: asset for asset in by_name.values()}
+
+    def url(self, name: str) -> str:
+        """URL for the current version of ``name`` (a path in the static folder)."""
+        asset = self._by_name.get(name)
+        if asset is None:
+            raise KeyError(f"Unknown static asset {name!r}")
+        return f"/static/{asset.hashed_name}"
+
+    def response(self, filename: str, request: Request) -> Response:
+        """Serve ``filename`` by hashed name (cached forever) or plain name (revalidated)."""
+        asset = self._by_hashed_name.get(filename)
+        cache_control = IMMUTABLE
+        if asset is None:
+            asset = self._by_name.get(filename)
+            cache_control = REVALIDATE
+        if asset is None:
+            abort(404)
+
+        body, encoding = asset.body, None
+        if asset.br is not None and "br" in request.accept_encodings:
+            body, encoding = asset.br, "br"
+        elif asset.gzip is not None and "gzip" in request.accept_encodings:
+            body, encoding = asset.gzip, "gzip"
+        # Each encoding is its own representation, so it gets its own ETag.
+        etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype=asset.mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = cache_control
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+def _build_asset(name: str, body: bytes) -> Asset:
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    stem, ext = os.path.splitext(name)
+    mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    asset = Asset(name, f"{stem}.{digest}{ext}", digest, mimetype, body)
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) < len(body):
+        asset.gzip = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        if len(compressed) < len(body):
+            asset.br = compressed
+    return asset
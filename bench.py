@@ -0,0 +1,206 @@
+"""Benchmarks for the engine and the HTTP endpoints.
+
+Run everything and compare against the stored baseline::
+
+    python bench.py --compare bench_baseline.json
+
+Results are JSON (``--output`` to write them to a file, ``--save-baseline``
+to replace the baseline). With ``--compare``, any benchmark slower than the
+baseline by more than ``--threshold`` is reported, and the exit status is 1.
+Comparisons use the fastest timing run, which is far less sensitive to
+machine noise than the median.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tictactoe import SearchStats, TicTacToe, TranspositionTable, minimax_best_move
+
+
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.25  # fractional slowdown counted as a regression
+
+# Positions for minimax_best_move: (name, board, player to move).
+POSITIONS: List[Tuple[str, str, str]] = [
+    ("empty", "         ", "X"),
+    ("center_reply", "    X    ", "O"),
+    ("corner_reply", "X        ", "O"),
+    ("fork_threat", "X   O   X", "O"),
+    ("midgame", "XO  X   O", "X"),
+    ("endgame", "XOXOX  O ", "X"),
+]
+
+# (name, function to time, calls per timing run)
+Benchmark = Tuple[str, Callable[[], object], int]
+
+
+def _game(board: str) -> TicTacToe:
+    game = TicTacToe()
+    game.board = list(board)
+    return game
+
+
+def engine_benchmarks() -> List[Benchmark]:
+    benches: List[Benchmark] = []
+    for name, board, player in POSITIONS:
+        game = _game(board)
+        # A fresh table per call measures a cold search; the shared default
+        # table measures the steady state a long-running server sees.
+        benches.append((
+            f"minimax_best_move[{name},cold]",
+            lambda game=game, player=player: minimax_best_move(game, player, player, table=TranspositionTable()),
+            3 if name == "empty" else 10,
+        ))
+        benches.append((
+            f"minimax_best_move[{name},warm]",
+            lambda game=game, player=player: minimax_best_move(game, player, player),
+            50,
+        ))
+
+    midgame = _game("XO  X   O")
+    won = _game("XXXOO    ")
+    benches += [
+        ("_check_winner[midgame]", midgame._check_winner, 20_000),
+        ("_check_winner[won]", won._check_winner, 20_000),
+        ("available_moves[midgame]", midgame.available_moves, 20_000),
+        ("clone[midgame]", midgame.clone, 20_000),
+        ("push_pop[midgame]", lambda: (midgame.push(2, "X"), midgame.pop()), 20_000),
+    ]
+    return benches
+
+
+def node_counts() -> Dict[str, Dict[str, int]]:
+    """Nodes a cold minimax search visits per position, with and without move ordering."""
+    counts = {}
+    for name, board, player in POSITIONS:
+        row = {}
+        for label, ordering in (("ordered", True), ("unordered", False)):
+            stats = SearchStats()
+            minimax_best_move(_game(board), player, player, table=TranspositionTable(), stats=stats, ordering=ordering)
+            row[label] = stats.nodes
+        counts[name] = row
+    return counts
+
+
+def http_benchmarks() -> List[Benchmark]:
+    # Keep the in-process app's database and game log out of the working tree.
+    scratch = tempfile.mkdtemp(prefix="tictactoe-bench-")
+    os.environ.setdefault("TICTACTOE_DB", os.path.join(scratch, "tictactoe.db"))
+    os.environ.setdefault("TICTACTOE_GAMELOG", os.path.join(scratch, "games.log"))
+    from app import app
+
+    client = app.test_client()
+    client.post("/start", data={"player_name": "Bench", "human": "X", "mode": "expert"})
+    benches: List[Benchmark] = []
+    for mode in ("beginner", "intermediate", "expert"):
+        for name, board in (("opening", "X        "), ("midgame", "XO  X    ")):
+            payload = {"board": list(board), "current": "O", "ai": "O", "mode": mode}
+            benches.append((
+                f"POST /ai-move[{mode},{name}]",
+                lambda payload=payload: client.post("/ai-move", json=payload),
+                200,
+            ))
+    return benches
+
+
+def measure(func: Callable[[], object], number: int, repeat: int) -> Dict[str, float]:
+    """Time ``repeat`` runs of ``number`` calls; report microseconds per call."""
+    func()  # warm up imports and caches
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "max_us": max(samples),
+        "calls": number * repeat,
+    }
+
+
+def run(selected: Optional[str] = None, repeat: int = 7, include_http: bool = True) -> Dict[str, object]:
+    benches = engine_benchmarks()
+    if include_http:
+        benches += http_benchmarks()
+    results = {}
+    for name, func, number in benches:
+        if selected and selected not in name:
+            continue
+        results[name] = measure(func, number, repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+        "nodes": node_counts(),
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> Tuple[List[str], bool]:
+    """Return report lines and whether any benchmark regressed."""
+    lines = [f"{'benchmark':<44}{'baseline us':>14}{'current us':>14}{'ratio':>8}"]
+    regressed = False
+    base_results = baseline.get("results", {})
+    for name, result in current["results"].items():
+        base = base_results.get(name)
+        if base is None:
+            lines.append(f"{name:<44}{'-':>14}{result['min_us']:>14.2f}{'new':>8}")
+            continue
+        ratio = result["min_us"] / base["min_us"] if base["min_us"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        regressed = regressed or bool(flag)
+        lines.append(f"{name:<44}{base['min_us']:>14.2f}{result['min_us']:>14.2f}{ratio:>8.2f}{flag}")
+    return lines, regressed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the engine and the HTTP endpoints.")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=7, help="timing runs per benchmark")
+    parser.add_argument("--no-http", action="store_true", help="skip the Flask endpoint benchmarks")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a stored baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"store these results as the baseline (default {DEFAULT_BASELINE})")
+    args = parser.parse_args(argv)
+
+    current = run(args.filter, args.repeat, include_http=not args.no_http)
+    text = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as fh:
+            fh.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        lines, regressed = compare(current, baseline, args.threshold)
+        print("\n".join(lines))
+        print()
+        print(f"{'minimax nodes (cold)':<44}{'unordered':>14}{'ordered':>14}{'ratio':>8}")
+        for name, row in current["nodes"].items():
+            print(f"{name:<44}{row['unordered']:>14}{row['ordered']:>14}{row['ordered'] / row['unordered']:>8.2f}")
+        return 1 if regressed else 0
+    if not args.output:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Write the solved 3x3 table as a memory-mappable solution file.
+
+Example::
+
+    python build_solution.py solution.bin
+
+The web app maps the file named by ``TICTACTOE_SOLUTION`` (default
+``solution.bin``) when it exists, so every worker shares one copy instead of
+solving the game at startup.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from tictactoe import SolutionFile, solved_table, write_solution_file
+
+
+DEFAULT_PATH = "solution.bin"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write the solved 3x3 table as a binary solution file.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--check", action="store_true", help="read the file back and compare every position")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    positions = write_solution_file(args.path)
+    print(f"wrote {positions} positions to {args.path} in {time.perf_counter() - started:.2f}s")
+
+    if args.check:
+        solution = SolutionFile(args.path)
+        mismatches = sum(1 for (x, o), entry in solved_table().items() if solution.get(x, o) != entry)
+        solution.close()
+        print(f"{mismatches} mismatches")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
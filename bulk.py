@@ -0,0 +1,86 @@
+"""Vectorized evaluation of many positions at once.
+
+Boards are an ``(N, cells)`` int8 array holding ``EMPTY``, ``X`` or ``O`` per
+cell, in the same cell order as ``TicTacToe.board``. Every check runs against
+the geometry's line-index matrix, so results match ``TicTacToe._check_winner``
+and ``TicTacToe.winning_line`` board for board.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+from tictactoe import STANDARD, Geometry
+
+
+EMPTY = 0
+X = 1
+O = 2
+
+_CELL_CODES = {"X": X, "O": O}
+
+# Rows per chunk, so the (rows, lines, k) intermediates stay small.
+DEFAULT_CHUNK_ROWS = 1 << 16
+
+
+@dataclass
+class BulkEvaluation:
+    winner: np.ndarray        # (N,) int8: EMPTY, X or O
+    terminal: np.ndarray      # (N,) bool
+    legal: np.ndarray         # (N, cells) bool: empty cells
+    winning_line: np.ndarray  # (N, k) intp: cell indices, -1 where nobody has won
+
+
+def line_index(geom: Geometry = STANDARD) -> np.ndarray:
+    """Return the ``(lines, k)`` matrix of cell indices for each winning line."""
+    return np.asarray(geom.lines, dtype=np.intp)
+
+
+def encode(boards: Iterable[Sequence[str]], geom: Geometry = STANDARD) -> np.ndarray:
+    """Convert boards in ``TicTacToe.board`` form to an int8 array."""
+    rows: List[List[int]] = [[_CELL_CODES.get(c, EMPTY) for c in board] for board in boards]
+    return np.array(rows, dtype=np.int8).reshape(-1, geom.size)
+
+
+def from_bitboards(x: np.ndarray, o: np.ndarray, geom: Geometry = STANDARD) -> np.ndarray:
+    """Expand arrays of ``TicTacToe.x`` / ``TicTacToe.o`` masks into boards."""
+    bits = np.arange(geom.size, dtype=np.int64)
+    x_cells = (np.asarray(x, dtype=np.int64)[:, None] >> bits) & 1
+    o_cells = (np.asarray(o, dtype=np.int64)[:, None] >> bits) & 1
+    return (x_cells * X + o_cells * O).astype(np.int8)
+
+
+def evaluate(boards: np.ndarray, geom: Geometry = STANDARD, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> BulkEvaluation:
+    """Evaluate every board in ``boards``.
+
+    Where several lines are complete, the first one in ``geom.lines`` wins,
+    as in ``TicTacToe._check_winner``.
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    if boards.ndim != 2 or boards.shape[1] != geom.size:
+        raise ValueError(f"Expected an (N, {geom.size}) array of boards")
+
+    lines = line_index(geom)
+    count = boards.shape[0]
+    winner = np.zeros(count, dtype=np.int8)
+    winning_line = np.full((count, geom.k), -1, dtype=np.intp)
+    for start in range(0, count, chunk_rows):
+        chunk = boards[start:start + chunk_rows]
+        cells = chunk[:, lines]                      # (rows, lines, k)
+        first = cells[:, :, 0]
+        complete = (first != EMPTY) & (cells == first[:, :, None]).all(axis=2)
+        has_winner = complete.any(axis=1)
+        first_line = complete.argmax(axis=1)
+        rows = np.nonzero(has_winner)[0]
+        winner[start + rows] = first[rows, first_line[rows]]
+        winning_line[start + rows] = lines[first_line[rows]]
+
+    legal = boards == EMPTY
+    terminal = (winner != EMPTY) | ~legal.any(axis=1)
+    return BulkEvaluation(winner, terminal, legal, winning_line)
+
+
+def winners(boards: np.ndarray, geom: Geometry = STANDARD) -> np.ndarray:
+    return evaluate(boards, geom).winner
@@ -0,0 +1,185 @@
+"""Move selection for each AI difficulty.
+
+Every engine has the same signature: it takes the game, the player it moves
+for, a ``random.Random`` and optionally a ``SearchStats`` to add its search
+nodes to, and returns a cell index, or -1 when there is no legal move. The
+web app and the tournament runner both pick engines from ``ENGINES`` by mode
+name. The minimax levels are ``SearchEngine``s set up by a ``Difficulty`` in
+``DIFFICULTIES``; add a level there, or any ``Engine`` to ``ENGINES``.
+"""
+from __future__ import annotations
+
+import random
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, Optional, Protocol, Tuple
+
+from mcts import mcts_best_move
+from metrics import ENGINE_NODES, ENGINE_SECONDS
+from tictactoe import (
+    STANDARD, Geometry, Player, SearchResult, SearchStats, TableCache, TicTacToe, negamax_best_move, solved_best_move,
+)
+
+
+class Engine(Protocol):
+    def __call__(self, game: TicTacToe, player: Player, rng: random.Random, stats: Optional[SearchStats] = None) -> int: ...
+
+
+_EDGES = (1, 3, 5, 7)
+# Table entries for levels without a node budget; depth-limited searches
+# store far fewer positions than this.
+_TABLE_SIZE = 50_000
+
+
+@dataclass(frozen=True)
+class Difficulty:
+    """How hard a search engine plays, and so how much work it does per move.
+
+    ``error_rate`` is the chance of playing a random legal move instead of
+    searching. With no depth limit the engine plays perfectly on 3x3 (a
+    table lookup) and searches larger boards until a budget runs out.
+    """
+
+    max_depth: Optional[int] = None  # plies; 0 never searches
+    node_budget: Optional[int] = None
+    time_budget: Optional[float] = None  # seconds
+    error_rate: float = 0.0
+    edge_opening: bool = False  # open on an edge of the 3x3 board, like a novice
+
+
+class SearchEngine:
+    """An ``Engine`` that plays at a given ``Difficulty``.
+
+    Each engine keeps its own transposition tables. A shallow level that
+    shared them would pick up deeper levels' results and play stronger
+    than its budget. Only the few most recently played board shapes keep a
+    table, each sized to hold one search's worth of nodes.
+    """
+
+    def __init__(self, difficulty: Difficulty) -> None:
+        self.difficulty = difficulty
+        self._tables = TableCache(table_size=difficulty.node_budget or _TABLE_SIZE)
+
+    def __call__(self, game: TicTacToe, player: Player, rng: random.Random, stats: Optional[SearchStats] = None) -> int:
+        moves = game.available_moves()
+        if not moves:
+            return -1
+        level = self.difficulty
+        if level.edge_opening and game.geometry is STANDARD and len(moves) >= 8:
+            edges = [i for i in _EDGES if game.board[i] == " "]
+            if edges:
+                return rng.choice(edges)
+        if level.max_depth == 0 or (level.error_rate and rng.random() < level.error_rate):
+            return rng.choice(moves)
+        if level.max_depth is None and game.geometry is STANDARD:
+            return solved_best_move(game, current_player=player)
+        table = self._tables.table(game.geometry)
+        result = negamax_best_move(game, player, level.max_depth, level.time_budget, level.node_budget, table)
+        return _counted(result, stats)
+
+# Each level searches only as deep as its strength needs: beginner plays at
+# random, intermediate looks two plies ahead (its own wins and the opponent's
+# threats) and still slips now and then, expert solves 3x3 and searches larger
+# boards until one of its budgets runs out.
+DIFFICULTIES: Dict[str, Difficulty] = {
+    "beginner": Difficulty(max_depth=0, edge_opening=True),
+    "intermediate": Difficulty(max_depth=2, error_rate=0.15, edge_opening=True),
+    "expert": Difficulty(node_budget=200_000, time_budget=0.5),
+}
+# MCTS stops at whichever of these runs out first.
+MCTS_PLAYOUTS = 5_000
+MCTS_TIME_BUDGET = 0.5  # seconds
+
+
+def _counted(result: SearchResult, stats: Optional[SearchStats]) -> int:
+    if stats is not None:
+        stats.nodes += result.nodes
+    return result.move
+
+
+def mcts_move(game: TicTacToe, player: Player, rng: random.Random, stats: Optional[SearchStats] = None) -> int:
+    result = mcts_best_move(game, player, playouts=MCTS_PLAYOUTS, time_budget=MCTS_TIME_BUDGET, rng=rng)
+    if stats is not None:
+        stats.nodes += result.playouts
+    return result.move
+
+
+ENGINES: Dict[str, Engine] = {name: SearchEngine(level) for name, level in DIFFICULTIES.items()}
+ENGINES["mcts"] = mcts_move
+
+_default_rng = random.Random()
+
+
+def seed_worker() -> None:
+    """Reseed the engines' random stream; run in each forked worker process.
+
+    Forked workers inherit the parent's generator state and would otherwise
+    all roll the same "random" moves.
+    """
+    _default_rng.seed()
+
+# Where searches on boards larger than 3x3 run; None means the calling thread.
+# 3x3 moves are lookups or shallow searches and run inline, except in these modes.
+_search_executor: Optional[Executor] = None
+_ALWAYS_SEARCHING = frozenset({"mcts"})
+
+
+def set_search_executor(executor: Optional[Executor]) -> None:
+    global _search_executor
+    _search_executor = executor
+
+
+def engine_mode(mode: str) -> str:
+    """The mode whose engine ``mode`` runs: itself if known, else expert."""
+    return mode if mode in ENGINES else "expert"
+
+
+def searches(geom: Geometry, mode: str) -> bool:
+    """Whether a move in ``mode`` on ``geom`` runs a search, not a lookup or a roll."""
+    level = DIFFICULTIES.get(engine_mode(mode))
+    if level is not None and level.max_depth == 0:
+        return False
+    return geom is not STANDARD or mode in _ALWAYS_SEARCHING
+
+
+def deterministic(mode: str) -> bool:
+    """Whether ``mode`` never rolls the dice, so a position always gets the same move."""
+    level = DIFFICULTIES.get(engine_mode(mode))
+    return level is not None and level.max_depth != 0 and not level.error_rate and not level.edge_opening
+
+
+def choose_move(game: TicTacToe, player: Player, mode: str, rng: Optional[random.Random] = None) -> int:
+    """Pick a move for ``player`` with the engine for ``mode`` (expert if unknown).
+
+    The engine's time and search nodes are recorded in the metrics.
+    """
+    geom = game.geometry
+    mode = engine_mode(mode)
+    if _search_executor is not None and rng is None and searches(geom, mode):
+        future = _search_executor.submit(move_in_position, geom.rows, geom.cols, geom.k, game.x, game.o, player, mode)
+        move, nodes, seconds = future.result()
+    else:
+        move, nodes, seconds = _timed_move(game, player, mode, rng or _default_rng)
+    board = f"{geom.rows}x{geom.cols}"
+    ENGINE_SECONDS.observe(seconds, mode=mode, board=board)
+    ENGINE_NODES.observe(nodes, mode=mode, board=board)
+    return move
+
+
+def move_in_position(rows: int, cols: int, k: int, x: int, o: int, player: Player, mode: str) -> Tuple[int, int, float]:
+    """Run the engine for ``mode`` on a position given as plain values.
+
+    This is what a search executor runs, so it never hands work off again.
+    Returns the move, the search nodes and the seconds it took.
+    """
+    game = TicTacToe(rows, cols, k)
+    game.x, game.o = x, o
+    return _timed_move(game, player, mode, _default_rng)
+
+
+def _timed_move(game: TicTacToe, player: Player, mode: str, rng: random.Random) -> Tuple[int, int, float]:
+    stats = SearchStats()
+    started = time.perf_counter()
+    move = ENGINES[mode](game, player, rng, stats)
+    return move, stats.nodes, time.perf_counter() - started
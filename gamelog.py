@@ -0,0 +1,232 @@
+"""Append-only binary log of finished games, with a streaming reader.
+
+The file starts with an 8-byte header (``TTTLOG`` and a version). Each game
+is then one record:
+
+- ``B`` number of moves
+- ``B`` rows << 4 | cols
+- ``B`` k << 4 | human played X << 3 | moves unordered << 2 | outcome
+  (0 draw, 1 X won, 2 O won)
+- ``B`` mode, as an index into ``MODES`` (255 if unknown)
+- ``H`` duration in seconds (capped at 65535)
+- ``I`` end time, Unix seconds
+- the moves in order: two per byte (first in the low nibble) when every
+  cell fits in a nibble, as on 3x3 and 4x4 boards, else one byte each
+
+Games from /ai-move, where the client posts whole boards, are logged
+unordered: their X and O marks alternate in cell order, which replays to
+the right final position but not through the positions actually played.
+
+A 3x3 game takes 15 bytes. Writers buffer records in memory and append
+whole records with a single ``write`` on an ``O_APPEND`` descriptor, so
+several worker processes can share one file. Example::
+
+    python gamelog.py summary games.log
+    python gamelog.py dump games.log | head
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Dict, Iterator, Optional, Sequence, Tuple
+
+from tictactoe import Player, TicTacToe
+
+
+MAGIC = b"TTTLOG"
+VERSION = 1
+_HEADER = struct.Struct("<6sH")
+_RECORD = struct.Struct("<BBBBHI")
+MODES = ("beginner", "intermediate", "expert", "mcts")
+_UNKNOWN_MODE = 255
+_OUTCOMES: Tuple[Optional[Player], ...] = (None, "X", "O")
+
+
+@dataclass
+class GameRecord:
+    moves: Tuple[int, ...]
+    rows: int
+    cols: int
+    k: int
+    human: Player
+    winner: Optional[Player]
+    mode: str
+    duration_seconds: int
+    finished_at: int
+    ordered: bool = True  # False when only the final position is known
+
+    def replay(self) -> TicTacToe:
+        """The final position, rebuilt by playing the moves."""
+        game = TicTacToe(self.rows, self.cols, self.k)
+        player = "X"
+        for move in self.moves:
+            game.make_move(move, player)
+            player = "O" if player == "X" else "X"
+        return game
+
+
+def encode(record: GameRecord) -> bytes:
+    mode = MODES.index(record.mode) if record.mode in MODES else _UNKNOWN_MODE
+    outcome = _OUTCOMES.index(record.winner)
+    head = _RECORD.pack(
+        len(record.moves),
+        record.rows << 4 | record.cols,
+        record.k << 4 | (record.human == "X") << 3 | (not record.ordered) << 2 | outcome,
+        mode,
+        min(max(record.duration_seconds, 0), 0xFFFF),
+        record.finished_at,
+    )
+    moves = record.moves
+    if record.rows * record.cols <= 16:
+        packed = bytearray((len(moves) + 1) // 2)
+        for i, move in enumerate(moves):
+            packed[i >> 1] |= move << (4 * (i & 1))
+        return head + bytes(packed)
+    return head + bytes(moves)
+
+
+def _moves_size(count: int, rows: int, cols: int) -> int:
+    return (count + 1) // 2 if rows * cols <= 16 else count
+
+
+def _decode(head: Tuple[int, ...], body: bytes) -> GameRecord:
+    count, shape, flags, mode, duration, finished_at = head
+    rows, cols = shape >> 4, shape & 15
+    if rows * cols <= 16:
+        moves = tuple(body[i >> 1] >> (4 * (i & 1)) & 15 for i in range(count))
+    else:
+        moves = tuple(body)
+    return GameRecord(
+        moves, rows, cols, flags >> 4, "X" if flags & 8 else "O", _OUTCOMES[flags & 3],
+        MODES[mode] if mode < len(MODES) else "unknown", duration, finished_at, not flags & 4,
+    )
+
+
+class GameLog:
+    """Buffered appender; ``flush`` (also run periodically and at exit) writes out."""
+
+    def __init__(self, path: str, buffer_size: int = 64 * 1024, flush_interval: Optional[float] = 1.0) -> None:
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        try:
+            # Only the process that creates the file writes the header.
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+            os.write(fd, _HEADER.pack(MAGIC, VERSION))
+        except FileExistsError:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        self._fd = fd
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+
+    def append(self, record: GameRecord) -> None:
+        data = encode(record)
+        with self._lock:
+            self._buffer += data
+            full = len(self._buffer) >= self.buffer_size
+        if full:
+            self.flush()
+        elif self._flusher is None and self.flush_interval is not None:
+            self._start_flusher()
+
+    def flush(self) -> None:
+        with self._lock:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            # One write per batch of whole records keeps other writers'
+            # records from landing in the middle of ours.
+            while data:
+                written = os.write(self._fd, data)
+                data = data[written:]
+
+    def close(self) -> None:
+        self.flush()
+        os.close(self._fd)
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_forever, name="gamelog-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+def iter_records(stream: BinaryIO) -> Iterator[GameRecord]:
+    """Yield the games in ``stream`` one at a time; a torn last record is skipped."""
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return
+    magic, version = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a game log")
+    if version != VERSION:
+        raise ValueError(f"Game log version {version}, expected {VERSION}")
+    read = stream.read
+    size = _RECORD.size
+    while True:
+        head_bytes = read(size)
+        if len(head_bytes) < size:
+            return
+        head = _RECORD.unpack(head_bytes)
+        body_size = _moves_size(head[0], head[1] >> 4, head[1] & 15)
+        body = read(body_size)
+        if len(body) < body_size:
+            return
+        yield _decode(head, body)
+
+
+def read_games(path: str) -> Iterator[GameRecord]:
+    with open(path, "rb", buffering=1 << 20) as stream:
+        yield from iter_records(stream)
+
+
+def summarize(records: Iterator[GameRecord]) -> Dict[str, Dict[str, float]]:
+    """Per-mode game counts, results for the human and mean length, in O(modes) memory."""
+    summary: Dict[str, Dict[str, float]] = {}
+    for record in records:
+        row = summary.setdefault(record.mode, {"games": 0, "human_wins": 0, "ai_wins": 0, "draws": 0,
+                                               "moves": 0, "seconds": 0})
+        row["games"] += 1
+        if record.winner is None:
+            row["draws"] += 1
+        elif record.winner == record.human:
+            row["human_wins"] += 1
+        else:
+            row["ai_wins"] += 1
+        row["moves"] += len(record.moves)
+        row["seconds"] += record.duration_seconds
+    for row in summary.values():
+        row["mean_moves"] = row.pop("moves") / row["games"]
+        row["mean_seconds"] = row.pop("seconds") / row["games"]
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Read a binary game log.")
+    parser.add_argument("command", choices=("summary", "dump"))
+    parser.add_argument("path")
+    args = parser.parse_args(argv)
+    records = read_games(args.path)
+    if args.command == "dump":
+        for record in records:
+            print(json.dumps(asdict(record), separators=(",", ":")))
+    else:
+        print(json.dumps(summarize(records), indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
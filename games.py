@@ -0,0 +1,225 @@
+"""Games held on the server, played one cell at a time.
+
+A ``ServerGame`` owns its board, so a client only ever sends the index of
+the cell it wants. Each move checks just the lines through that cell and
+counts moves instead of scanning the board for a draw.
+
+``GameStore`` keeps games in this process's memory, which is enough for a
+single worker. With several worker processes use ``SQLiteGameStore`` so a
+move can land on any of them (``create_game_store`` picks one).
+"""
+from __future__ import annotations
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from tictactoe import Geometry, Player, TicTacToe, other_player
+
+
+class GameError(ValueError):
+    """A move that the game cannot accept (wrong turn, taken cell, finished game)."""
+
+
+@dataclass
+class ServerGame:
+    id: str
+    owner: str  # session id of the player
+    game: TicTacToe
+    human: Player
+    mode: str
+    current: Player = "X"
+    moves: int = 0
+    winner: Optional[Player] = None
+    winning_line: Tuple[int, ...] = ()
+    history: List[int] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def ai(self) -> Player:
+        return other_player(self.human)
+
+    @property
+    def over(self) -> bool:
+        return self.winner is not None or self.moves == self.game.geometry.size
+
+    def play(self, index: int, player: Player) -> None:
+        """Put ``player``'s mark on ``index`` and update the result.
+
+        Raises ``ValueError`` for a cell off the board and ``GameError`` for
+        a move the game cannot take.
+        """
+        if self.over:
+            raise GameError("Game is over")
+        if player != self.current:
+            raise GameError(f"It is {self.current}'s turn")
+        if not 0 <= index < self.game.geometry.size:
+            raise ValueError(f"Move index must be in range 0..{self.game.geometry.size - 1}")
+        if not self.game.is_legal(index):
+            raise GameError(f"Cell {index} is not free")
+        game = self.game
+        game.place(index, player)
+        self.moves += 1
+        self.history.append(index)
+        marks = game.x if player == "X" else game.o
+        for mask in game.geometry.lines_through[index]:
+            if marks & mask == mask:
+                self.winner = player
+                self.winning_line = tuple(i for i in range(game.geometry.size) if mask >> i & 1)
+                break
+        self.current = other_player(player)
+
+    def status(self) -> str:
+        if self.winner is not None:
+            return f"Winner: {self.winner}"
+        if self.over:
+            return "Draw"
+        return f"Turn: {self.current}"
+
+
+class GameStore:
+    """Live games by id, dropping the least recently used past ``max_games``."""
+
+    def __init__(self, max_games: int = 100_000) -> None:
+        self.max_games = max_games
+        self._games: "OrderedDict[str, ServerGame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, owner: str, geom: Geometry, human: Player, mode: str) -> ServerGame:
+        game = ServerGame(
+            secrets.token_urlsafe(12), owner, TicTacToe(geom.rows, geom.cols, geom.k), human, mode
+        )
+        with self._lock:
+            self._games[game.id] = game
+            while len(self._games) > self.max_games:
+                self._games.popitem(last=False)
+        return game
+
+    def get(self, game_id: str, owner: str) -> Optional[ServerGame]:
+        """The game with ``game_id`` if it belongs to ``owner``."""
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None or game.owner != owner:
+                return None
+            self._games.move_to_end(game_id)
+            return game
+
+    def save(self, game: ServerGame, moves_before: int) -> bool:
+        """Store ``game`` after moves were played on it since it had ``moves_before``.
+
+        Returns False if another request changed the game in the meantime.
+        Games here are shared objects changed under their lock, so this
+        never fails.
+        """
+        return True
+
+    def reopen(self) -> None:
+        """Reconnect to the backing store, e.g. in a freshly forked worker."""
+
+    def discard(self, game_id: str) -> None:
+        with self._lock:
+            self._games.pop(game_id, None)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+
+class SQLiteGameStore(GameStore):
+    """Games as rows in SQLite, shared by every worker on the host.
+
+    A row holds the shape, players and move history; ``get`` rebuilds the
+    game by replaying the moves. Each request works on its own copy, and
+    ``save`` only writes if the stored game still has the moves the copy
+    started from, so two requests racing on one game can't both apply.
+    Every ``purge_interval`` seconds a new game also deletes the games
+    nobody has played for ``max_age`` seconds.
+    """
+
+    def __init__(self, path: str, max_age: float = 24 * 3600, purge_interval: float = 3600) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            " id TEXT PRIMARY KEY, owner TEXT NOT NULL, rows INTEGER NOT NULL, cols INTEGER NOT NULL,"
+            " k INTEGER NOT NULL, human TEXT NOT NULL, mode TEXT NOT NULL, moves INTEGER NOT NULL,"
+            " history TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS games_updated ON games (updated)")
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic()
+
+    def reopen(self) -> None:
+        # A SQLite connection must not be used across fork().
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def create(self, owner: str, geom: Geometry, human: Player, mode: str) -> ServerGame:
+        game = ServerGame(
+            secrets.token_urlsafe(12), owner, TicTacToe(geom.rows, geom.cols, geom.k), human, mode
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO games (id, owner, rows, cols, k, human, mode, moves, history, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 0, '[]', ?)",
+                (game.id, owner, geom.rows, geom.cols, geom.k, human, mode, time.time()),
+            )
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + self.purge_interval
+            self.purge(self.max_age)
+        return game
+
+    def get(self, game_id: str, owner: str) -> Optional[ServerGame]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT rows, cols, k, human, mode, history FROM games WHERE id = ? AND owner = ?",
+                (game_id, owner),
+            ).fetchone()
+        if row is None:
+            return None
+        rows, cols, k, human, mode, history = row
+        game = ServerGame(game_id, owner, TicTacToe(rows, cols, k), human, mode)
+        player = "X"
+        for index in json.loads(history):
+            game.play(index, player)
+            player = other_player(player)
+        return game
+
+    def save(self, game: ServerGame, moves_before: int) -> bool:
+        if game.moves == moves_before:
+            return True
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE games SET moves = ?, history = ?, updated = ? WHERE id = ? AND moves = ?",
+                (game.moves, json.dumps(game.history), time.time(), game.id, moves_before),
+            )
+        return cursor.rowcount == 1
+
+    def purge(self, older_than: float) -> int:
+        """Delete games not played for ``older_than`` seconds."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM games WHERE updated < ?", (time.time() - older_than,))
+        return cursor.rowcount
+
+    def discard(self, game_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+
+def create_game_store(kind: str = "memory", path: str = "tictactoe.db") -> GameStore:
+    """Build the game store for ``kind`` ("memory" or "sqlite"), as for sessions."""
+    if kind == "memory":
+        return GameStore()
+    if kind == "sqlite":
+        return SQLiteGameStore(path)
+    raise ValueError(f"Unknown store {kind!r}; expected 'memory' or 'sqlite'")
@@ -0,0 +1,22 @@
+"""Gunicorn settings: ``gunicorn -c gunicorn.conf.py``.
+
+TICTACTOE_BIND (default 0.0.0.0:5000) and TICTACTOE_WORKERS (default one
+per core) override the basics; any gunicorn flag still wins over this file.
+"""
+import os
+
+wsgi_app = "wsgi:application"
+bind = os.environ.get("TICTACTOE_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("TICTACTOE_WORKERS", os.cpu_count() or 1))
+# Load and warm the app once in the master; workers inherit it on fork.
+preload_app = True
+
+# Every worker must see every session and every /games game, so keep them in
+# SQLite rather than per-process memory unless told otherwise.
+os.environ.setdefault("TICTACTOE_STORE", "sqlite")
+
+
+def post_fork(server, worker):
+    from app import after_fork
+
+    after_fork()
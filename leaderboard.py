@@ -0,0 +1,229 @@
+"""Cross-player leaderboard and per-mode totals in SQLite.
+
+Aggregates are kept up to date as games end instead of being recomputed:
+each finished game adds to an in-memory delta for its (player, mode), and
+the deltas are upserted into the aggregate tables in one transaction per
+batch (every ``flush_interval`` seconds, or when ``max_pending`` players are
+waiting). Reads go to the tables, so a game shows up on the board within
+one flush. Rankings are read through indexes, so a page costs the same with
+a thousand recorded games as with millions.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from stores import STAT_KEYS
+
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_modes (
+    sid TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    name TEXT NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    human_wins INTEGER NOT NULL DEFAULT 0,
+    ai_wins INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    best_win_seconds INTEGER,
+    PRIMARY KEY (sid, mode)
+);
+CREATE INDEX IF NOT EXISTS player_modes_rank ON player_modes (mode, human_wins DESC, ai_wins);
+CREATE TABLE IF NOT EXISTS players (
+    sid TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    human_wins INTEGER NOT NULL DEFAULT 0,
+    ai_wins INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    best_win_seconds INTEGER
+);
+CREATE INDEX IF NOT EXISTS players_rank ON players (human_wins DESC, ai_wins);
+CREATE TABLE IF NOT EXISTS mode_totals (
+    mode TEXT PRIMARY KEY,
+    games INTEGER NOT NULL DEFAULT 0,
+    human_wins INTEGER NOT NULL DEFAULT 0,
+    ai_wins INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Upserts add a batch's deltas; best times keep the smaller non-null value.
+_ADD_COUNTS = (
+    " games = games + excluded.games,"
+    " human_wins = human_wins + excluded.human_wins,"
+    " ai_wins = ai_wins + excluded.ai_wins,"
+    " draws = draws + excluded.draws"
+)
+_KEEP_BEST = (
+    ", best_win_seconds = CASE"
+    " WHEN best_win_seconds IS NULL THEN excluded.best_win_seconds"
+    " WHEN excluded.best_win_seconds IS NULL THEN best_win_seconds"
+    " ELSE MIN(best_win_seconds, excluded.best_win_seconds) END"
+)
+
+
+@dataclass
+class Standing:
+    rank: int
+    name: str
+    games: int
+    human_wins: int
+    ai_wins: int
+    draws: int
+    best_win_seconds: Optional[int]
+
+
+@dataclass
+class _Delta:
+    name: str
+    counts: List[int]  # human_wins, ai_wins, draws
+    best_win_seconds: Optional[int] = None
+
+
+class Leaderboard:
+    def __init__(self, path: str, flush_interval: Optional[float] = 1.0, max_pending: int = 1_000) -> None:
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn_lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], _Delta] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def reopen(self) -> None:
+        """Open a fresh connection, e.g. in a worker forked after this was created."""
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def record(self, sid: str, name: str, mode: str, result: str, duration_seconds: Optional[int] = None) -> None:
+        """Count one finished game; ``result`` is one of ``STAT_KEYS``."""
+        index = STAT_KEYS.index(result)
+        with self._lock:
+            delta = self._pending.get((sid, mode))
+            if delta is None:
+                delta = self._pending[(sid, mode)] = _Delta(name, [0] * len(STAT_KEYS))
+            delta.name = name
+            delta.counts[index] += 1
+            if result == "human_wins" and duration_seconds is not None:
+                if delta.best_win_seconds is None or duration_seconds < delta.best_win_seconds:
+                    delta.best_win_seconds = duration_seconds
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.flush()
+        elif self._flusher is None and self.flush_interval is not None:
+            self._start_flusher()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        mode_rows: Dict[str, List[int]] = {}
+        player_rows: Dict[str, _Delta] = {}
+        for (sid, mode), delta in batch.items():
+            totals = mode_rows.setdefault(mode, [0] * len(STAT_KEYS))
+            player = player_rows.setdefault(sid, _Delta(delta.name, [0] * len(STAT_KEYS)))
+            player.name = delta.name
+            for i, count in enumerate(delta.counts):
+                totals[i] += count
+                player.counts[i] += count
+            if delta.best_win_seconds is not None and (
+                player.best_win_seconds is None or delta.best_win_seconds < player.best_win_seconds
+            ):
+                player.best_win_seconds = delta.best_win_seconds
+        with self._conn_lock:
+            try:
+                self._write(batch, player_rows, mode_rows)
+            except sqlite3.Error:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                self._restore(batch)
+                log.exception("Leaderboard flush failed; keeping %d deltas for the next one", len(batch))
+
+    def _write(self, batch: Dict[Tuple[str, str], _Delta], player_rows: Dict[str, _Delta],
+               mode_rows: Dict[str, List[int]]) -> None:
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT INTO player_modes (sid, mode, name, games, human_wins, ai_wins, draws, best_win_seconds)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (sid, mode) DO UPDATE SET name = excluded.name," + _ADD_COUNTS + _KEEP_BEST,
+            [(sid, mode, d.name, sum(d.counts), *d.counts, d.best_win_seconds) for (sid, mode), d in batch.items()],
+        )
+        self._conn.executemany(
+            "INSERT INTO players (sid, name, games, human_wins, ai_wins, draws, best_win_seconds)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (sid) DO UPDATE SET name = excluded.name," + _ADD_COUNTS + _KEEP_BEST,
+            [(sid, d.name, sum(d.counts), *d.counts, d.best_win_seconds) for sid, d in player_rows.items()],
+        )
+        self._conn.executemany(
+            "INSERT INTO mode_totals (mode, games, human_wins, ai_wins, draws) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (mode) DO UPDATE SET" + _ADD_COUNTS,
+            [(mode, sum(counts), *counts) for mode, counts in mode_rows.items()],
+        )
+        self._conn.execute("COMMIT")
+
+    def _restore(self, batch: Dict[Tuple[str, str], _Delta]) -> None:
+        """Put an unwritten batch back in front of whatever was recorded since."""
+        with self._lock:
+            for key, delta in batch.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = delta
+                    continue
+                for i, count in enumerate(delta.counts):
+                    newer.counts[i] += count
+                if delta.best_win_seconds is not None and (
+                    newer.best_win_seconds is None or delta.best_win_seconds < newer.best_win_seconds
+                ):
+                    newer.best_win_seconds = delta.best_win_seconds
+
+    def top(self, mode: Optional[str] = None, limit: int = 20) -> List[Standing]:
+        """Best players by wins (then fewest losses), over all modes or one."""
+        columns = "name, games, human_wins, ai_wins, draws, best_win_seconds"
+        with self._conn_lock:
+            if mode is None:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM players ORDER BY human_wins DESC, ai_wins LIMIT ?", (limit,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM player_modes WHERE mode = ? ORDER BY human_wins DESC, ai_wins LIMIT ?",
+                    (mode, limit),
+                ).fetchall()
+        return [Standing(rank, *row) for rank, row in enumerate(rows, start=1)]
+
+    def mode_totals(self) -> Dict[str, Dict[str, int]]:
+        with self._conn_lock:
+            rows = self._conn.execute("SELECT mode, games, human_wins, ai_wins, draws FROM mode_totals").fetchall()
+        return {mode: dict(zip(("games",) + STAT_KEYS, counts)) for mode, *counts in rows}
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_forever, name="leaderboard-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Leaderboard flush failed")
+
+
+def create_leaderboard(path: str) -> Leaderboard:
+    leaderboard = Leaderboard(path)
+    atexit.register(leaderboard.flush)
+    return leaderboard
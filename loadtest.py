@@ -0,0 +1,296 @@
+"""Load generator: N simulated players playing whole games against the app.
+
+Each player follows the browser's flow: ``/start``, ``/new-game``, one
+``/ai-move`` per turn, then ``/result``. With ``--api games`` it uses
+``POST /games`` and ``/games/<id>/move`` instead. Human moves are random
+legal cells. Examples::
+
+    python loadtest.py --players 50 --duration 30 --mix beginner=1,expert=3
+    python loadtest.py --url http://localhost:5000 --players 200 --games 20
+
+Without ``--url`` the app runs in this process through Flask's test client,
+so nothing needs to be listening and nothing leaves the machine.
+"""
+from __future__ import annotations
+
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from tictactoe import other_player
+
+
+class Client:
+    """One player's connection; it keeps that player's session cookie."""
+
+    def request(self, method: str, path: str, json_body: Optional[dict] = None,
+                form: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[dict]]:
+        raise NotImplementedError
+
+
+class TestClient(Client):
+    def __init__(self) -> None:
+        # Keep the in-process app's database and game log out of the working tree.
+        scratch = tempfile.mkdtemp(prefix="tictactoe-loadtest-")
+        os.environ.setdefault("TICTACTOE_DB", os.path.join(scratch, "tictactoe.db"))
+        os.environ.setdefault("TICTACTOE_GAMELOG", os.path.join(scratch, "games.log"))
+        from app import app
+
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, json_body: Optional[dict] = None,
+                form: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[dict]]:
+        response = self._client.open(path, method=method, json=json_body, data=form)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient(Client):
+    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method: str, path: str, json_body: Optional[dict] = None,
+                form: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[dict]]:
+        headers = {}
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        elif form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self._opener.open(req, timeout=self.timeout) as response:
+                status, body = response.status, response.read()
+                content_type = response.headers.get("Content-Type", "")
+        except urllib.error.HTTPError as exc:
+            status, body, content_type = exc.code, exc.read(), exc.headers.get("Content-Type", "")
+        if "json" in content_type and body:
+            return status, json.loads(body)
+        return status, None
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    """Per-route timings for one player thread; merged at the end."""
+
+    def __init__(self) -> None:
+        self.routes: Dict[str, RouteStats] = {}
+        self.games = 0
+
+    def call(self, client: Client, route: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        stats = self.routes.setdefault(route, RouteStats())
+        started = time.perf_counter()
+        try:
+            status, body = client.request(method, path, **kwargs)
+        except Exception:  # connection errors, timeouts, bad JSON
+            status, body = 0, None
+        stats.latencies.append(time.perf_counter() - started)
+        # Redirects are part of the normal /start flow.
+        if status == 0 or status >= 400:
+            stats.errors += 1
+            return None
+        return body if body is not None else {}
+
+    def merge(self, other: "Recorder") -> None:
+        self.games += other.games
+        for route, stats in other.routes.items():
+            mine = self.routes.setdefault(route, RouteStats())
+            mine.latencies += stats.latencies
+            mine.errors += stats.errors
+
+
+def play_classic_game(client: Client, mode: str, size: int, k: int, rng: random.Random, rec: Recorder) -> bool:
+    human = rng.choice("XO")
+    ai = other_player(human)
+    rec.call(client, "GET /start", "GET", "/start")
+    rec.call(client, "POST /start", "POST", "/start", form={"player_name": "Load", "human": human, "mode": mode})
+    if rec.call(client, "POST /new-game", "POST", "/new-game", json_body={"mode": mode}) is None:
+        return False
+    board = [" "] * (size * size)
+    current = "X"
+    while True:
+        if current == human:
+            free = [i for i, cell in enumerate(board) if cell == " "]
+            board[rng.choice(free)] = human
+            current = ai
+        payload = {"board": board, "current": current, "ai": ai, "mode": mode, "rows": size, "cols": size, "k": k}
+        data = rec.call(client, "POST /ai-move", "POST", "/ai-move", json_body=payload)
+        if data is None:
+            return False
+        board, current = data["board"], data["next"]
+        if data["gameOver"]:
+            break
+    return rec.call(client, "GET /result", "GET", "/result") is not None
+
+
+def play_api_game(client: Client, mode: str, size: int, k: int, rng: random.Random, rec: Recorder) -> bool:
+    human = rng.choice("XO")
+    rec.call(client, "GET /start", "GET", "/start")
+    data = rec.call(client, "POST /games", "POST", "/games",
+                    json_body={"mode": mode, "human": human, "rows": size, "cols": size, "k": k})
+    if data is None:
+        return False
+    game_id, board = data["id"], data["board"]
+    while not data["gameOver"]:
+        cell = rng.choice([i for i, c in enumerate(board) if c == " "])
+        board[cell] = human
+        data = rec.call(client, "POST /games/<id>/move", "POST", f"/games/{game_id}/move", json_body={"cell": cell})
+        if data is None:
+            return False
+        if data["move"] >= 0:
+            board[data["move"]] = other_player(human)
+    return rec.call(client, "GET /result", "GET", "/result") is not None
+
+
+FLOWS = {"classic": play_classic_game, "games": play_api_game}
+
+
+@dataclass
+class LoadReport:
+    players: int
+    seconds: float
+    games: int
+    routes: Dict[str, Dict[str, float]]
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    def table(self) -> str:
+        requests = sum(int(r["requests"]) for r in self.routes.values())
+        lines = [
+            f"{self.players} players, {self.games} games in {self.seconds:.1f}s: "
+            f"{self.games_per_second:.1f} games/s, {requests / self.seconds:.1f} requests/s",
+            f"{'route':<26}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+        ]
+        for route, r in sorted(self.routes.items()):
+            lines.append(
+                f"{route:<26}{int(r['requests']):>10}{r['error_rate']:>7.1%} "
+                f"{r['p50_ms']:>9.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """``"beginner=1,expert=3"`` -> weights by mode."""
+    mix = {}
+    for part in text.split(","):
+        mode, _, weight = part.partition("=")
+        mix[mode.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def run_load(
+    players: int,
+    mix: Dict[str, float],
+    url: Optional[str] = None,
+    games_per_player: Optional[int] = None,
+    duration: Optional[float] = None,
+    flow: str = "classic",
+    size: int = 3,
+    k: Optional[int] = None,
+    seed: int = 0,
+) -> LoadReport:
+    """Run ``players`` threads until each has played its games or time is up."""
+    if games_per_player is None and duration is None:
+        raise ValueError("Give a game count per player, a duration or both")
+    play = FLOWS[flow]
+    k = k or size
+    modes, weights = list(mix), list(mix.values())
+    # Import the app (and build its tables) before the clock starts.
+    clients: List[Client] = [HttpClient(url) if url else TestClient() for _ in range(players)]
+    recorders = [Recorder() for _ in range(players)]
+    stop_at = time.perf_counter() + duration if duration is not None else None
+
+    def player(index: int) -> None:
+        rng = random.Random(seed * 100_003 + index)
+        rec = recorders[index]
+        while games_per_player is None or rec.games < games_per_player:
+            if stop_at is not None and time.perf_counter() >= stop_at:
+                break
+            mode = rng.choices(modes, weights)[0]
+            if play(clients[index], mode, size, k, rng, rec):
+                rec.games += 1
+
+    threads = [threading.Thread(target=player, args=(i,), name=f"player-{i}") for i in range(players)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    total = Recorder()
+    for rec in recorders:
+        total.merge(rec)
+    routes = {}
+    for route, stats in total.routes.items():
+        latencies = sorted(stats.latencies)
+        count = len(latencies)
+        routes[route] = {
+            "requests": count,
+            "errors": stats.errors,
+            "error_rate": stats.errors / count if count else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+    return LoadReport(players, seconds, total.games, routes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent players against the app.")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--games", type=int, default=None, help="games per player")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run (default 10 without --games)")
+    parser.add_argument("--mix", default="beginner=1,intermediate=1,expert=1", help="mode weights, e.g. expert=3,mcts=1")
+    parser.add_argument("--url", help="server to load (default: the app in-process via Flask's test client)")
+    parser.add_argument("--api", choices=sorted(FLOWS), default="classic", help="client flow to follow")
+    parser.add_argument("--rows", type=int, default=3, help="board side")
+    parser.add_argument("--k", type=int, default=None, help="win length (default: board side)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    duration = args.duration if args.duration is not None or args.games is not None else 10.0
+    report = run_load(args.players, parse_mix(args.mix), args.url, args.games, duration,
+                      args.api, args.rows, args.k, args.seed)
+    if args.json:
+        print(json.dumps(dict(vars(report), games_per_second=report.games_per_second), indent=2))
+    else:
+        print(report.table())
+    errors = sum(r["errors"] for r in report.routes.values())
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
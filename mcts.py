@@ -0,0 +1,267 @@
+"""Monte Carlo Tree Search engine for any board shape.
+
+Each iteration walks down the tree by UCT, adds one child, finishes the game
+with uniformly random moves and backs the result up. The cost is set exactly
+by a playout count and/or a time budget, and it does not grow with the
+board the way exhaustive search does.
+
+The subtree under the chosen move is kept, keyed by the position it leads
+to. When the opponent's reply arrives, the search continues from that node
+instead of starting over. Positions are matched by content, so reuse also
+works for stateless /ai-move callers. Kept trees live in the process that
+grew them: when moves run in a process pool, a reply that lands in another
+worker starts a fresh tree.
+"""
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from tictactoe import Geometry, Player, TicTacToe, geometry
+
+
+EXPLORATION = 1.4
+MAX_KEPT_TREES = 256
+
+# Playout results.
+DRAW, X_WINS, O_WINS = 0, 1, 2
+
+
+@dataclass
+class MCTSResult:
+    move: int
+    playouts: int  # run by this call
+    visits: int  # of the chosen move, including reused ones
+    value: float  # mean reward of the chosen move for the player to move
+    reused: int  # root visits carried over from the previous search
+
+
+class Node:
+    __slots__ = ("move", "parent", "children", "untried", "visits", "reward", "x", "o", "x_to_move", "result")
+
+    def __init__(self, geom: Geometry, x: int, o: int, x_to_move: bool, move: int = -1,
+                 parent: Optional["Node"] = None, result: Optional[int] = None) -> None:
+        self.move = move
+        self.parent = parent
+        self.children: List[Node] = []
+        self.x = x
+        self.o = o
+        self.x_to_move = x_to_move
+        self.result = result  # DRAW/X_WINS/O_WINS once the game is over here
+        self.untried = [] if result is not None else geom.moves(~(x | o) & geom.full_mask)
+        self.visits = 0
+        # Sum of results for the player who moved into this node: 1 win, 0.5 draw.
+        self.reward = 0.0
+
+
+class MCTS:
+    """One search tree, grown by ``run``."""
+
+    def __init__(self, geom: Geometry, root: Node, rng: random.Random, exploration: float = EXPLORATION) -> None:
+        self.geom = geom
+        self.root = root
+        self.rng = rng
+        self.exploration = exploration
+
+    def run(self, playouts: Optional[int] = None, deadline: Optional[float] = None) -> int:
+        """Run iterations until ``playouts`` are done or ``deadline`` passes."""
+        done = 0
+        while playouts is None or done < playouts:
+            if deadline is not None and not done & 63 and time.perf_counter() > deadline:
+                break
+            self._iterate()
+            done += 1
+        return done
+
+    def _iterate(self) -> None:
+        node = self.root
+        while not node.untried and node.children:
+            node = self._select(node)
+        if node.untried:
+            node = self._expand(node)
+        result = node.result if node.result is not None else self._playout(node)
+        while node is not None:
+            node.visits += 1
+            if result == DRAW:
+                node.reward += 0.5
+            elif (result == X_WINS) != node.x_to_move:
+                # The player who moved into this node is the one not to move.
+                node.reward += 1.0
+            node = node.parent
+
+    def _select(self, node: Node) -> Node:
+        log_visits = math.log(node.visits)
+        c = self.exploration
+        best, best_score = node.children[0], -1.0
+        for child in node.children:
+            score = child.reward / child.visits + c * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _expand(self, node: Node) -> Node:
+        untried = node.untried
+        move = untried.pop(self.rng.randrange(len(untried)))
+        geom = self.geom
+        x, o = node.x, node.o
+        if node.x_to_move:
+            x |= 1 << move
+            marks, win = x, X_WINS
+        else:
+            o |= 1 << move
+            marks, win = o, O_WINS
+        result = None
+        for mask in geom.lines_through[move]:
+            if marks & mask == mask:
+                result = win
+                break
+        if result is None and (x | o) == geom.full_mask:
+            result = DRAW
+        child = Node(geom, x, o, not node.x_to_move, move, node, result)
+        node.children.append(child)
+        return child
+
+    def _playout(self, node: Node) -> int:
+        geom = self.geom
+        lines_through = geom.lines_through
+        x, o, x_to_move = node.x, node.o, node.x_to_move
+        # A random order of the free cells is a uniformly random game.
+        cells = geom.moves(~(x | o) & geom.full_mask)
+        self.rng.shuffle(cells)
+        for cell in cells:
+            if x_to_move:
+                x |= 1 << cell
+                marks = x
+            else:
+                o |= 1 << cell
+                marks = o
+            for mask in lines_through[cell]:
+                if marks & mask == mask:
+                    return X_WINS if x_to_move else O_WINS
+            x_to_move = not x_to_move
+        return DRAW
+
+    def best_child(self) -> Node:
+        return max(self.root.children, key=lambda child: child.visits)
+
+
+_kept: "OrderedDict[Tuple[Geometry, int, int, bool], Node]" = OrderedDict()
+_kept_lock = threading.Lock()
+
+
+def _take_kept_tree(geom: Geometry, x: int, o: int, x_to_move: bool) -> Optional[Node]:
+    """The node for this position under a tree kept by an earlier search, if any."""
+    # The opponent just moved; try each of their marks as that move.
+    theirs = o if x_to_move else x
+    with _kept_lock:
+        for cell in geom.moves(theirs):
+            bit = 1 << cell
+            key = (geom, x & ~bit, o & ~bit, not x_to_move)
+            parent = _kept.pop(key, None)
+            if parent is None:
+                continue
+            for child in parent.children:
+                if child.move == cell:
+                    child.parent = None
+                    return child
+    return None
+
+
+def _keep_tree(geom: Geometry, node: Node) -> None:
+    node.parent = None
+    with _kept_lock:
+        _kept[(geom, node.x, node.o, node.x_to_move)] = node
+        while len(_kept) > MAX_KEPT_TREES:
+            _kept.popitem(last=False)
+
+
+def mcts_best_move(
+    game: TicTacToe,
+    player: Player,
+    playouts: Optional[int] = 2_000,
+    time_budget: Optional[float] = None,
+    workers: int = 1,
+    rng: Optional[random.Random] = None,
+    reuse: bool = True,
+) -> MCTSResult:
+    """Pick a move for ``player`` by MCTS.
+
+    The search stops after ``playouts`` iterations or ``time_budget``
+    seconds, whichever comes first (at least one must be given). With
+    ``workers > 1`` that many independent trees are grown in separate
+    processes, each with the full budget, and their root visit counts are
+    summed (root parallelism); trees are then not reused.
+    """
+    if playouts is None and time_budget is None:
+        raise ValueError("Give a playout count, a time budget or both")
+    geom = game.geometry
+    x_to_move = player == "X"
+    if not game.available_moves() or game._check_winner() is not None:
+        return MCTSResult(-1, 0, 0, 0.0, 0)
+    rng = rng or random.Random()
+
+    if workers > 1:
+        return _root_parallel(geom, game.x, game.o, x_to_move, playouts, time_budget, workers, rng)
+
+    root = _take_kept_tree(geom, game.x, game.o, x_to_move) if reuse else None
+    if root is None:
+        root = Node(geom, game.x, game.o, x_to_move)
+    reused = root.visits
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    tree = MCTS(geom, root, rng)
+    done = tree.run(playouts, deadline)
+    if not root.children:  # not even one iteration fitted in the budget
+        done += tree.run(1)
+    best = tree.best_child()
+    if reuse:
+        _keep_tree(geom, best)
+    return MCTSResult(best.move, done, best.visits, best.reward / best.visits, reused)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers < workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool, _pool_workers = ProcessPoolExecutor(workers), workers
+    return _pool
+
+
+def _search_root(task: Tuple[int, int, int, int, int, bool, Optional[int], Optional[float], int]) -> Tuple[Dict[int, int], Dict[int, float], int]:
+    rows, cols, k, x, o, x_to_move, playouts, time_budget, seed = task
+    geom = geometry(rows, cols, k)
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    tree = MCTS(geom, Node(geom, x, o, x_to_move), random.Random(seed))
+    done = tree.run(playouts, deadline)
+    if not tree.root.children:
+        done += tree.run(1)
+    children = tree.root.children
+    return {c.move: c.visits for c in children}, {c.move: c.reward for c in children}, done
+
+
+def _root_parallel(geom: Geometry, x: int, o: int, x_to_move: bool, playouts: Optional[int],
+                   time_budget: Optional[float], workers: int, rng: random.Random) -> MCTSResult:
+    tasks = [
+        (geom.rows, geom.cols, geom.k, x, o, x_to_move, playouts, time_budget, rng.getrandbits(64))
+        for _ in range(workers)
+    ]
+    visits: Dict[int, int] = {}
+    rewards: Dict[int, float] = {}
+    done = 0
+    for tree_visits, tree_rewards, tree_done in _process_pool(workers).map(_search_root, tasks):
+        done += tree_done
+        for move, count in tree_visits.items():
+            visits[move] = visits.get(move, 0) + count
+            rewards[move] = rewards.get(move, 0.0) + tree_rewards[move]
+    move = max(visits, key=visits.__getitem__)
+    return MCTSResult(move, done, visits[move], rewards[move] / visits[move], 0)
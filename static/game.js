@@ -0,0 +1,169 @@
+const boardEl = document.getElementById('board');
+const statusEl = document.getElementById('status');
+const newBtn = document.getElementById('new');
+let resultBtn;
+
+// Win length and tile size for each board size
+const WIN_LENGTH = { 3: 3, 4: 4, 5: 4 };
+const TILE_SIZE = { 3: '110px', 4: '84px', 5: '68px' };
+let size = 3;
+let board = Array(9).fill(' ');
+const config = document.body.dataset;
+let human = config.human;
+let ai = human === 'X' ? 'O' : 'X';
+let current = 'X';
+let gameOver = false;
+let winningLine = [];
+let gameId = null;
+
+function ensureResultButton() {
+  if (!resultBtn) {
+    const btn = document.createElement('a');
+    btn.href = '#';
+    btn.id = 'resultBtn';
+    btn.className = 'button';
+    btn.style.marginLeft = '8px';
+    btn.textContent = 'View Result';
+    document.querySelector('.controls').appendChild(btn);
+    resultBtn = btn;
+  }
+  resultBtn.style.display = gameOver ? '' : 'none';
+}
+
+function getMode() {
+  const sel = document.getElementById('level');
+  return sel ? sel.value : config.mode;
+}
+
+function getSize() {
+  const sel = document.getElementById('size');
+  return sel ? parseInt(sel.value, 10) : 3;
+}
+
+function syncLevelLabel() {
+  const txt = document.getElementById('levelText');
+  if (txt) {
+    const m = getMode();
+    txt.textContent = m.charAt(0).toUpperCase() + m.slice(1);
+  }
+}
+
+function render() {
+  boardEl.innerHTML = '';
+  board.forEach((cell, idx) => {
+    const div = document.createElement('div');
+    const disabled = (gameOver || cell !== ' ');
+    const hl = gameOver && winningLine.includes(idx) ? ' highlight' : '';
+    div.className = 'cell' + (disabled ? ' disabled' : '') + hl;
+    div.textContent = cell;
+    div.addEventListener('click', () => onCellClick(idx));
+    boardEl.appendChild(div);
+  });
+  statusEl.textContent = gameOver ? statusEl.textContent : `Turn: ${current}`;
+  ensureResultButton();
+}
+
+function postJSON(url, body) {
+  return fetch(url, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) });
+}
+
+// Game channel: one WebSocket for all moves when the server offers it
+// (ASGI deployments), with the JSON endpoints as the fallback.
+let socket = null;
+const pending = [];
+
+function openSocket() {
+  if (!('WebSocket' in window)) return Promise.resolve(null);
+  return new Promise((resolve) => {
+    const ws = new WebSocket(`${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}/games/socket`);
+    ws.onopen = () => resolve(ws);
+    ws.onerror = () => resolve(null);
+    ws.onmessage = (e) => { const next = pending.shift(); if (next) next(JSON.parse(e.data)); };
+    ws.onclose = () => {
+      socket = null;
+      while (pending.length) pending.shift()(null);
+    };
+  });
+}
+
+// Send over the socket if it is open, else POST; resolves to { status, data }.
+async function gameRequest(message, url, body) {
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    const data = await new Promise((resolve) => {
+      pending.push(resolve);
+      socket.send(JSON.stringify(message));
+    });
+    if (data) return { status: data.code || 200, data };
+  }
+  const res = await postJSON(url, body);
+  return { status: res.status, data: await res.json() };
+}
+
+function applyState(data) {
+  current = data.next;
+  gameOver = data.gameOver;
+  statusEl.textContent = data.status;
+  winningLine = Array.isArray(data.winningLine) ? data.winningLine : [];
+  if (gameOver) {
+    // keep final board visible and show result button
+    render();
+    if (resultBtn) {
+      const winner = data.status.startsWith('Winner: ') ? data.status.split(': ')[1] : '';
+      const params = new URLSearchParams({ result: winner ? 'win' : 'draw', winner, human, ai });
+      resultBtn.onclick = (e) => { e.preventDefault(); window.location.href = `/result?${params.toString()}`; };
+    }
+    return;
+  }
+  render();
+}
+
+async function reset() {
+  size = getSize();
+  board = Array(size * size).fill(' ');
+  boardEl.style.setProperty('--cols', size);
+  boardEl.style.setProperty('--tile', TILE_SIZE[size]);
+  current = 'X';
+  gameOver = false;
+  winningLine = [];
+  human = config.human;
+  ai = human === 'X' ? 'O' : 'X';
+  render();
+  // The server holds the board; it opens for the AI when the human plays O.
+  const settings = { mode: getMode(), human, rows: size, cols: size, k: WIN_LENGTH[size] };
+  const { data } = await gameRequest({ new: settings }, '/games', settings);
+  syncLevelLabel();
+  gameId = data.id;
+  board = data.board;
+  applyState(data);
+}
+
+async function onCellClick(i) {
+  if (gameOver || current !== human || board[i] !== ' ') return;
+  board[i] = human;
+  current = ai;
+  render();
+  const { status, data } = await gameRequest({ id: gameId, cell: i }, `/games/${gameId}/move`, { cell: i });
+  if (status >= 400) {
+    // Out of step with the server (or the game expired): take its board.
+    if (status === 404) return reset();
+    board = data.board;
+    return applyState(data);
+  }
+  if (data.move >= 0) board[data.move] = ai;
+  applyState(data);
+}
+
+newBtn.addEventListener('click', reset);
+const levelSel = document.getElementById('level');
+if (levelSel) {
+  levelSel.addEventListener('change', reset);
+}
+const sizeSel = document.getElementById('size');
+if (sizeSel) {
+  sizeSel.addEventListener('change', reset);
+}
+// Start first game
+openSocket().then((ws) => {
+  socket = ws;
+  reset();
+});
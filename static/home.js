@@ -0,0 +1,9 @@
+document.querySelectorAll('.tile-group input[type="radio"]').forEach((input) => {
+  input.addEventListener('change', () => {
+    const name = input.name;
+    document.querySelectorAll(`.tile-group input[name="${name}"]`).forEach((r) => {
+      const tile = r.closest('.tile');
+      if (tile) tile.classList.toggle('selected', r.checked);
+    });
+  });
+});
@@ -0,0 +1,111 @@
+const config = document.body.dataset;
+const params = new URLSearchParams(window.location.search);
+const result = params.get('result');
+const winner = params.get('winner');
+const human = params.get('human');
+const ai = params.get('ai');
+const title = document.getElementById('title');
+const subtitle = document.getElementById('subtitle');
+const badge = document.getElementById('resultPill');
+// visual elements
+const confetti = document.getElementById('confetti');
+const extra = document.getElementById('extraBadges');
+const timeBar = document.getElementById('timeBar');
+const attemptsValue = document.getElementById('attemptsValue');
+const timePretty = document.getElementById('timePretty');
+const resultValue = document.getElementById('resultValue');
+const shareBtn = document.getElementById('shareBtn');
+const achievementsHeader = document.getElementById('achievementsHeader');
+const achievementsGrid = document.getElementById('achievementsGrid');
+
+function setAchievementsVisible(show) {
+  if (!achievementsHeader || !achievementsGrid) return;
+  achievementsHeader.style.display = show ? '' : 'none';
+  achievementsGrid.style.display = show ? '' : 'none';
+}
+
+function addBadge(text, cls='draw') {
+  const b = document.createElement('div');
+  b.className = `tile ${cls}`;
+  b.textContent = text;
+  extra.appendChild(b);
+}
+
+function makeConfetti() {
+  return; // disabled
+  const colors = ['#fbbf24','#34d399','#60a5fa','#f472b6','#f97316','#a78bfa'];
+  const count = 120;
+  for (let i=0;i<count;i++) {
+    const piece = document.createElement('span');
+    const left = Math.random()*100;
+    const delay = Math.random()*0.7;
+    const dur = 1.8 + Math.random()*1.6;
+    const col = colors[Math.floor(Math.random()*colors.length)];
+    piece.style.left = left + '%';
+    piece.style.background = col;
+    piece.style.transform = `translateY(-10vh) rotate(${Math.random()*360}deg)`;
+    piece.style.animationDuration = dur + 's';
+    piece.style.animationDelay = delay + 's';
+    if (confetti) confetti.appendChild(piece);
+  }
+  // Force a repaint to start animations in some browsers
+  // by reading offsetHeight after appending
+  if (confetti) void confetti.offsetHeight;
+}
+
+// pretty time (m:ss)
+function formatTime(sec){ const m = Math.floor(sec/60); const s = (sec%60).toString().padStart(2,'0'); return m>0? `${m}:${s}` : `${sec}s`; }
+
+if (result === 'draw') {
+  document.title = 'Game Complete • Draw';
+  subtitle.textContent = `You (${human}) vs AI (${ai})`;
+  badge.textContent = 'Draw';
+  badge.className = 'tile draw';
+  resultValue.textContent = 'Draw';
+} else if (winner) {
+  const youWon = winner === human;
+  document.title = youWon ? 'Game Complete • Victory' : 'Game Complete • Defeat';
+  subtitle.textContent = youWon ? `Congratulations ${config.playerName}!` : `Good try, ${config.playerName}!`;
+  resultValue.textContent = youWon ? 'Win' : 'Loss';
+  if (youWon) {
+    badge.textContent = 'Perfect! 🏆';
+    badge.className = 'tile win';
+    makeConfetti();
+    setAchievementsVisible(true);
+  } else {
+    badge.textContent = 'Defeat';
+    badge.className = 'tile loss';
+    setAchievementsVisible(false);
+  }
+} else {
+  document.title = 'Game Complete';
+  subtitle.textContent = `You (${human}) vs AI (${ai})`;
+  badge.textContent = 'Game Over';
+  badge.className = 'tile draw';
+  setAchievementsVisible(true);
+}
+
+// Time-based badges from server-injected seconds
+const durationSeconds = Number(config.durationSeconds);
+const bestTime = Number(config.bestTimeSeconds);
+const personalBest = config.personalBest === 'true';
+// Progress bar scales to 120s baseline and caps at 100%
+const pct = Math.min(100, Math.round((durationSeconds/120)*100));
+requestAnimationFrame(() => { timeBar.style.width = pct + '%'; });
+timePretty.textContent = formatTime(durationSeconds);
+attemptsValue.textContent = Number(config.attempts);
+if (durationSeconds <= 10) addBadge('Quick Game', 'win');
+if (durationSeconds >= 60) addBadge('Marathon', 'draw');
+if (personalBest) addBadge('New Personal Best', 'win');
+
+if (shareBtn) {
+  shareBtn.addEventListener('click', async () => {
+    try {
+      await navigator.clipboard.writeText(window.location.href);
+      shareBtn.textContent = 'Link Copied!';
+      setTimeout(() => shareBtn.textContent = 'Share Result', 1200);
+    } catch (e) {
+      alert('Link: ' + window.location.href);
+    }
+  });
+}
@@ -0,0 +1,336 @@
+"""Server-side session and game-stats storage.
+
+The session cookie only carries an opaque random id. Session data lives in a
+``SessionBackend`` (in memory or SQLite), and the win/loss/draw counters live
+in a ``StatsStore`` that buffers increments and writes them out in batches.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Request, Response
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+STAT_KEYS = ("human_wins", "ai_wins", "draws")
+LEVELS = ("beginner", "intermediate", "expert", "mcts")
+
+log = logging.getLogger(__name__)
+
+
+class SessionBackend:
+    def load(self, sid: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def save(self, sid: str, data: dict) -> None:
+        raise NotImplementedError
+
+    def delete(self, sid: str) -> None:
+        raise NotImplementedError
+
+    def reopen(self) -> None:
+        """Reconnect to the backing store, e.g. in a freshly forked worker."""
+
+
+class MemorySessionBackend(SessionBackend):
+    """Sessions in a process-local dict, dropping the least recently used."""
+
+    def __init__(self, max_sessions: int = 100_000) -> None:
+        self.max_sessions = max_sessions
+        self._data: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, sid: str) -> Optional[dict]:
+        with self._lock:
+            data = self._data.get(sid)
+            if data is None:
+                return None
+            self._data.move_to_end(sid)
+            return dict(data)
+
+    def save(self, sid: str, data: dict) -> None:
+        with self._lock:
+            self._data[sid] = dict(data)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._data.pop(sid, None)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Sessions as JSON rows in SQLite, shared by every worker on the host.
+
+    Every ``purge_interval`` seconds a save also deletes the sessions nobody
+    has saved for ``max_age`` seconds.
+    """
+
+    def __init__(self, path: str, max_age: float = 30 * 24 * 3600, purge_interval: float = 3600) -> None:
+        self.path = path
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic()
+
+    def reopen(self) -> None:
+        # A SQLite connection must not be used across fork().
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def load(self, sid: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, sid: str, data: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, updated) VALUES (?, ?, ?)",
+                (sid, json.dumps(data, separators=(",", ":")), time.time()),
+            )
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + self.purge_interval
+            self.purge(self.max_age)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def purge(self, older_than: float) -> int:
+        """Delete sessions not saved for ``older_than`` seconds."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - older_than,))
+        return cursor.rowcount
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, sid: str, initial: Optional[dict] = None, new: bool = False) -> None:
+        def on_update(session: "ServerSession") -> None:
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keep session data in a backend; the cookie only holds the session id.
+
+    The cookie is only sent when a new session is first saved, so ordinary
+    responses carry no Set-Cookie header at all.
+    """
+
+    def __init__(self, backend: SessionBackend) -> None:
+        self.backend = backend
+
+    def open_session(self, app: Flask, request: Request) -> ServerSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.backend.load(sid)
+            if data is not None:
+                return ServerSession(sid, data)
+        return ServerSession(secrets.token_urlsafe(24), new=True)
+
+    def save_session(self, app: Flask, session: ServerSession, response: Response) -> None:  # type: ignore[override]
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+        self.backend.save(session.sid, dict(session))
+        if session.new or session.permanent:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def empty_level_stats() -> Dict[str, Dict[str, int]]:
+    return {level: {key: 0 for key in STAT_KEYS} for level in LEVELS}
+
+
+class StatsStore:
+    """Per-session win/loss/draw counters with write-behind batching.
+
+    ``increment`` only bumps an in-memory delta. Deltas are written with
+    ``_write`` when ``max_pending`` sessions/levels are waiting, every
+    ``flush_interval`` seconds from a background thread, and on ``flush()``.
+    Reads add the pending deltas to what was written, so they are never stale.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = 1.0, max_pending: int = 1_000) -> None:
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], List[int]] = {}
+        self._lock = threading.Lock()
+        # Held while a batch moves from _pending to storage, so readers never
+        # see it in neither place.
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def increment(self, sid: str, level: str, key: str) -> None:
+        index = STAT_KEYS.index(key)
+        with self._lock:
+            deltas = self._pending.get((sid, level))
+            if deltas is None:
+                deltas = self._pending[(sid, level)] = [0] * len(STAT_KEYS)
+            deltas[index] += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.flush()
+        elif self._flusher is None and self.flush_interval is not None:
+            self._start_flusher()
+
+    def level_stats(self, sid: str) -> Dict[str, Dict[str, int]]:
+        stats = empty_level_stats()
+        with self._flush_lock:
+            rows = list(self._read(sid))
+            with self._lock:
+                rows += [(level, list(deltas)) for (psid, level), deltas in self._pending.items() if psid == sid]
+        for level, counts in rows:
+            level_counts = stats.setdefault(level, {key: 0 for key in STAT_KEYS})
+            for key, count in zip(STAT_KEYS, counts):
+                level_counts[key] += count
+        return stats
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            except Exception:
+                # Keep the deltas for the next flush rather than losing them.
+                with self._lock:
+                    for key, deltas in batch.items():
+                        newer = self._pending.setdefault(key, [0] * len(STAT_KEYS))
+                        for i, delta in enumerate(deltas):
+                            newer[i] += delta
+                log.exception("Stats flush failed; keeping %d deltas for the next one", len(batch))
+
+    def _start_flusher(self) -> None:
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_forever, name="stats-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Stats flush failed")
+
+    def reopen(self) -> None:
+        """Reconnect to the backing store, e.g. in a freshly forked worker."""
+
+    def _read(self, sid: str) -> Iterable[Tuple[str, List[int]]]:
+        raise NotImplementedError
+
+    def _write(self, batch: Dict[Tuple[str, str], List[int]]) -> None:
+        raise NotImplementedError
+
+
+class MemoryStatsStore(StatsStore):
+    def __init__(self, flush_interval: Optional[float] = None, max_pending: int = 1_000) -> None:
+        super().__init__(flush_interval, max_pending)
+        self._counts: Dict[str, Dict[str, List[int]]] = {}
+        self._counts_lock = threading.Lock()
+
+    def _read(self, sid: str) -> Iterable[Tuple[str, List[int]]]:
+        with self._counts_lock:
+            return [(level, list(counts)) for level, counts in self._counts.get(sid, {}).items()]
+
+    def _write(self, batch: Dict[Tuple[str, str], List[int]]) -> None:
+        with self._counts_lock:
+            for (sid, level), deltas in batch.items():
+                counts = self._counts.setdefault(sid, {}).setdefault(level, [0] * len(STAT_KEYS))
+                for i, delta in enumerate(deltas):
+                    counts[i] += delta
+
+
+class SQLiteStatsStore(StatsStore):
+    def __init__(self, path: str, flush_interval: Optional[float] = 1.0, max_pending: int = 1_000) -> None:
+        super().__init__(flush_interval, max_pending)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS level_stats ("
+            " sid TEXT NOT NULL, level TEXT NOT NULL,"
+            " human_wins INTEGER NOT NULL DEFAULT 0, ai_wins INTEGER NOT NULL DEFAULT 0, draws INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (sid, level))"
+        )
+        self._conn_lock = threading.Lock()
+
+    def reopen(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+
+    def _read(self, sid: str) -> Iterable[Tuple[str, List[int]]]:
+        with self._conn_lock:
+            rows = self._conn.execute(
+                "SELECT level, human_wins, ai_wins, draws FROM level_stats WHERE sid = ?", (sid,)
+            ).fetchall()
+        return [(row[0], list(row[1:])) for row in rows]
+
+    def _write(self, batch: Dict[Tuple[str, str], List[int]]) -> None:
+        rows = [(sid, level, *deltas) for (sid, level), deltas in batch.items()]
+        with self._conn_lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT INTO level_stats (sid, level, human_wins, ai_wins, draws) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (sid, level) DO UPDATE SET"
+                    " human_wins = human_wins + excluded.human_wins,"
+                    " ai_wins = ai_wins + excluded.ai_wins,"
+                    " draws = draws + excluded.draws",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+
+def create_stores(kind: str = "memory", path: str = "tictactoe.db") -> Tuple[SessionBackend, StatsStore]:
+    """Build the session backend and stats store for ``kind`` ("memory" or "sqlite")."""
+    if kind == "memory":
+        return MemorySessionBackend(), MemoryStatsStore()
+    if kind == "sqlite":
+        stats = SQLiteStatsStore(path)
+        atexit.register(stats.flush)
+        return SQLiteSessionBackend(path), stats
+    raise ValueError(f"Unknown store {kind!r}; expected 'memory' or 'sqlite'")
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, Hashable, List, Optional, Tuple
 
 
 Player = str  # "X" or "O"
@@ -18,33 +23,252 @@ class MoveResult:
     is_draw: bool
 
 
+def _winning_lines(rows: int, cols: int, k: int) -> List[Tuple[int, ...]]:
+    lines: List[Tuple[int, ...]] = []
+    directions = ((0, 1), (1, 0), (1, 1), (1, -1))  # rows, cols, diagonals
+    for dr, dc in directions:
+        for r in range(rows):
+            for c in range(cols):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < rows and 0 <= end_c < cols:
+                    lines.append(tuple((r + dr * i) * cols + c + dc * i for i in range(k)))
+    return lines
+
+
+def _symmetry_permutations(rows: int, cols: int) -> Tuple[Tuple[int, ...], ...]:
+    """The rotations and reflections of the board.
+
+    Square boards have the 8 symmetries of the D4 group, other rectangles the
+    4 that keep their shape. Each permutation maps a cell index to the index
+    it moves to.
+    """
+    perms = []
+    for flip in (False, True):
+        for turns in range(4 if rows == cols else 1):
+            perm = []
+            for i in range(rows * cols):
+                r, c = divmod(i, cols)
+                if flip:
+                    c = cols - 1 - c
+                for _ in range(turns):
+                    r, c = c, rows - 1 - r
+                perm.append(r * cols + c)
+            perms.append(tuple(perm))
+    if rows != cols:
+        # Upside-down and half-turn images of a rectangle.
+        for perm in list(perms):
+            perms.append(tuple((rows - 1 - p // cols) * cols + p % cols for p in perm))
+    return tuple(perms)
+
+
+class Geometry:
+    """Shape of an m,n,k board: ``rows`` x ``cols`` cells, ``k`` in a row wins.
+
+    Holds everything derived from the shape that the engine needs at every
+    node: winning lines as cell indices and bitmasks, the lines through each
+    cell, and lookup tables for the board's symmetries. Use ``geometry()`` to
+    get the shared instance for a shape.
+    """
+
+    def __init__(self, rows: int, cols: int, k: int) -> None:
+        if rows < 1 or cols < 1:
+            raise ValueError("Board must have at least one row and one column")
+        if k < 1 or k > max(rows, cols):
+            raise ValueError("Win length must fit on the board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.full_mask = (1 << self.size) - 1
+        self.lines = tuple(_winning_lines(rows, cols, k))
+        self.line_masks = tuple(sum(1 << i for i in line) for line in self.lines)
+        self.lines_through = tuple(
+            tuple(mask for mask in self.line_masks if mask >> i & 1) for i in range(self.size)
+        )
+        self.symmetries = _symmetry_permutations(rows, cols)
+        # How many lines pass through each cell: the center and corners of a
+        # 3x3 board score highest, so searches try them first.
+        self.cell_rank = tuple(len(masks) for masks in self.lines_through)
+
+        # Free-cell mask -> indices of its set bits, for boards small enough.
+        self._moves_by_mask: Optional[Tuple[Tuple[int, ...], ...]] = None
+        if self.size <= 12:
+            self._moves_by_mask = tuple(
+                tuple(i for i in range(self.size) if mask >> i & 1) for mask in range(self.full_mask + 1)
+            )
+
+        # Symmetries are applied to masks through per-chunk lookup tables:
+        # one chunk covering the whole board when it is small, bytes otherwise.
+        self._chunk_bits = self.size if self.size <= 12 else 8
+        chunk_count = -(-self.size // self._chunk_bits)
+        self._symmetry_tables = tuple(
+            tuple(
+                tuple(
+                    sum(1 << perm[base + i] for i in range(self._chunk_bits) if chunk >> i & 1 and base + i < self.size)
+                    for chunk in range(1 << self._chunk_bits)
+                )
+                for base in range(0, chunk_count * self._chunk_bits, self._chunk_bits)
+            )
+            for perm in self.symmetries
+        )
+
+    def __repr__(self) -> str:
+        return f"Geometry(rows={self.rows}, cols={self.cols}, k={self.k})"
+
+    def moves(self, free: int) -> List[int]:
+        if self._moves_by_mask is not None:
+            return list(self._moves_by_mask[free])
+        moves = []
+        while free:
+            low = free & -free
+            moves.append(low.bit_length() - 1)
+            free ^= low
+        return moves
+
+    def canonical(self, a: int, b: int) -> int:
+        """Return one integer shared by a pair of masks and all its symmetric images."""
+        shift = self.size
+        if self._chunk_bits == self.size:
+            return min(tables[0][a] | tables[0][b] << shift for tables in self._symmetry_tables)
+        bits = self._chunk_bits
+        chunk_mask = (1 << bits) - 1
+        best = -1
+        for tables in self._symmetry_tables:
+            ta = tb = 0
+            for j, table in enumerate(tables):
+                ta |= table[a >> j * bits & chunk_mask]
+                tb |= table[b >> j * bits & chunk_mask]
+            key = ta | tb << shift
+            if best < 0 or key < best:
+                best = key
+        return best
+
+
+_GEOMETRIES: Dict[Tuple[int, int, int], Geometry] = {}
+
+
+def geometry(rows: int = 3, cols: int = 3, k: int = 3) -> Geometry:
+    """Return the shared Geometry for a shape, so shapes compare by identity."""
+    key = (rows, cols, k)
+    geom = _GEOMETRIES.get(key)
+    if geom is None:
+        geom = _GEOMETRIES.setdefault(key, Geometry(rows, cols, k))
+    return geom
+
+
+STANDARD = geometry()
+LINES = STANDARD.lines
+LINE_MASKS = STANDARD.line_masks
+FULL_MASK = STANDARD.full_mask
+SYMMETRIES = STANDARD.symmetries
+
+
 class TicTacToe:
-    def __init__(self) -> None:
-        self.board: List[str] = [" "] * 9
+    """An m,n,k board stored as one occupancy bitmask per player.
+
+    Bit ``i`` of ``x`` (or ``o``) is set when cell ``i`` holds that player's
+    mark. ``board`` exposes the familiar list of " ", "X" and "O" strings.
+    The default shape is classic 3x3 tic-tac-toe.
+
+    Searches play on a single board with ``push``/``pop`` instead of cloning
+    it at every node.
+    """
+
+    __slots__ = ("geometry", "x", "o", "_pushed")
+
+    def __init__(self, rows: int = 3, cols: int = 3, k: int = 3) -> None:
+        self.geometry = geometry(rows, cols, k)
+        self.x = 0
+        self.o = 0
+        self._pushed: List[int] = []
+
+    @property
+    def size(self) -> int:
+        return self.geometry.size
+
+    @property
+    def board(self) -> List[str]:
+        x, o = self.x, self.o
+        return ["X" if x >> i & 1 else "O" if o >> i & 1 else " " for i in range(self.geometry.size)]
+
+    @board.setter
+    def board(self, cells: List[str]) -> None:
+        x = o = 0
+        for i, cell in enumerate(cells[:self.geometry.size]):
+            if cell == "X":
+                x |= 1 << i
+            elif cell == "O":
+                o |= 1 << i
+        self.x, self.o = x, o
 
     def clone(self) -> "TicTacToe":
-        clone = TicTacToe()
-        clone.board = self.board.copy()
+        clone = TicTacToe.__new__(TicTacToe)
+        clone.geometry = self.geometry
+        clone.x = self.x
+        clone.o = self.o
+        clone._pushed = []
         return clone
 
     def available_moves(self) -> List[int]:
-        return [i for i, cell in enumerate(self.board) if cell == " "]
+        return self.geometry.moves(~(self.x | self.o) & self.geometry.full_mask)
+
+    def is_legal(self, index: int) -> bool:
+        return 0 <= index < self.geometry.size and not (self.x | self.o) >> index & 1
 
     def make_move(self, index: int, player: Player) -> MoveResult:
-        if index < 0 or index >= 9:
-            raise ValueError("Move index must be in range 0..8")
-        if self.board[index] != " ":
+        if index < 0 or index >= self.geometry.size:
+            raise ValueError(f"Move index must be in range 0..{self.geometry.size - 1}")
+        if (self.x | self.o) >> index & 1:
             raise ValueError("Cell is already occupied")
-        if player not in ("X", "O"):
+        if player == "X":
+            self.x |= 1 << index
+        elif player == "O":
+            self.o |= 1 << index
+        else:
             raise ValueError("Player must be 'X' or 'O'")
 
-        self.board[index] = player
         winner = self._check_winner()
-        is_draw = winner is None and all(c != " " for c in self.board)
-        return MoveResult(self.board.copy(), winner, is_draw)
+        is_draw = winner is None and (self.x | self.o) == self.geometry.full_mask
+        return MoveResult(self.board, winner, is_draw)
+
+    def place(self, index: int, player: Player) -> None:
+        """Place a mark without any checks, for callers that checked ``is_legal``.
+
+        Unlike ``push`` it cannot be undone, and unlike ``make_move`` it
+        neither validates nor reports the result.
+        """
+        if player == "X":
+            self.x |= 1 << index
+        else:
+            self.o |= 1 << index
+
+    def push(self, index: int, player: Player) -> None:
+        """Place a mark without any checks; undo it with ``pop``."""
+        # Inlined rather than calling place(): this runs once per search node.
+        if player == "X":
+            self.x |= 1 << index
+        else:
+            self.o |= 1 << index
+        self._pushed.append(index)
+
+    def pop(self) -> int:
+        """Take back the most recent ``push`` and return its cell."""
+        index = self._pushed.pop()
+        keep = ~(1 << index)
+        self.x &= keep
+        self.o &= keep
+        return index
+
+    def completes_line(self, index: int, player: Player) -> bool:
+        """Whether ``player`` marking ``index`` would complete a line."""
+        marks = (self.x if player == "X" else self.o) | 1 << index
+        for mask in self.geometry.lines_through[index]:
+            if marks & mask == mask:
+                return True
+        return False
 
     def is_terminal(self) -> bool:
-        return self._check_winner() is not None or all(c != " " for c in self.board)
+        return (self.x | self.o) == self.geometry.full_mask or self._check_winner() is not None
 
     def evaluate(self, maximizing_player: Player) -> int:
         winner = self._check_winner()
@@ -55,67 +279,668 @@ class TicTacToe:
         return 0
 
     def _check_winner(self) -> Optional[Player]:
-        lines: Tuple[Tuple[int, int, int], ...] = (
-            (0, 1, 2), (3, 4, 5), (6, 7, 8),  # rows
-            (0, 3, 6), (1, 4, 7), (2, 5, 8),  # cols
-            (0, 4, 8), (2, 4, 6),             # diagonals
-        )
-        for a, b, c in lines:
-            if self.board[a] != " " and self.board[a] == self.board[b] == self.board[c]:
-                return self.board[a]
+        x, o = self.x, self.o
+        for mask in self.geometry.line_masks:
+            if x & mask == mask:
+                return "X"
+            if o & mask == mask:
+                return "O"
         return None
 
-    def winning_line(self) -> Optional[Tuple[int, int, int]]:
+    def winning_line(self) -> Optional[Tuple[int, ...]]:
         """Return the indices of the winning line, if any."""
-        lines: Tuple[Tuple[int, int, int], ...] = (
-            (0, 1, 2), (3, 4, 5), (6, 7, 8),  # rows
-            (0, 3, 6), (1, 4, 7), (2, 5, 8),  # cols
-            (0, 4, 8), (2, 4, 6),             # diagonals
-        )
-        for a, b, c in lines:
-            if self.board[a] != " " and self.board[a] == self.board[b] == self.board[c]:
-                return (a, b, c)
+        x, o = self.x, self.o
+        for line, mask in zip(self.geometry.lines, self.geometry.line_masks):
+            if x & mask == mask or o & mask == mask:
+                return line
         return None
 
 
-def minimax_best_move(game: TicTacToe, current_player: Player, ai_player: Player) -> int:
+def canonical_key(game: TicTacToe) -> int:
+    """Return one integer shared by a position and all its symmetric images."""
+    return game.geometry.canonical(game.x, game.o)
+
+
+# Board strings: one character per cell in index order, "X", "O" or "." for
+# empty. Both directions run through str.translate and int/format, with no
+# Python-level loop over the cells.
+_X_DIGITS = str.maketrans("XO.", "100")
+_O_DIGITS = str.maketrans("XO.", "010")
+_CELL_CHARS = str.maketrans("012", ".XO")
+
+
+def parse_board_string(text: str, size: int) -> Tuple[int, int]:
+    """Return the ``(x, o)`` bitboards of a board string of ``size`` cells."""
+    if not isinstance(text, str):
+        raise ValueError("Board must be a string")
+    if len(text) != size:
+        raise ValueError(f"Board string must have {size} cells")
+    x_digits = text.translate(_X_DIGITS)
+    # int() would also take signs, spaces and underscores, so check first.
+    if x_digits.strip("01"):
+        raise ValueError("Board string may only contain 'X', 'O' and '.'")
+    # Cell i is bit i, so the string reads as a binary number backwards.
+    return int(x_digits[::-1], 2), int(text.translate(_O_DIGITS)[::-1], 2)
+
+
+def board_string(x: int, o: int, size: int) -> str:
+    # Reading a mask's binary digits as hex gives each cell its own digit.
+    digits = int(format(x, "b"), 16) + 2 * int(format(o, "b"), 16)
+    return format(digits, f"0{size}x")[::-1].translate(_CELL_CHARS)
+
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    """Bounded cache of search values, evicting the least recently used entry.
+
+    Values are stored with a flag telling whether they are exact or only a
+    lower/upper bound, as produced by a search that was cut off by alpha/beta,
+    and the remaining depth they were searched to (0 for searches that always
+    run to the end of the game).
+    """
+
+    def __init__(self, max_size: int = 200_000) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, int, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:  # evicted by a concurrent search
+            pass
+        return entry
+
+    def store(self, key: Hashable, value: float, flag: int, depth: int = 0) -> None:
+        self._entries[key] = (value, flag, depth)
+        self._entries.move_to_end(key)
+        self.stores += 1
+        while len(self._entries) > self.max_size:
+            try:
+                self._entries.popitem(last=False)
+            except KeyError:
+                break
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+
+class TableCache:
+    """Transposition tables per board geometry, keeping the ``max_tables`` most recently used.
+
+    Tables are never shared between geometries, and clients can ask for many
+    board shapes, so this bounds the memory to ``max_tables`` full tables.
+    """
+
+    def __init__(self, max_tables: int = 4, table_size: int = 200_000) -> None:
+        self.max_tables = max_tables
+        self.table_size = table_size
+        self._tables: "OrderedDict[Geometry, TranspositionTable]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def table(self, geom: Geometry) -> TranspositionTable:
+        table = self._tables.get(geom)
+        if table is None:
+            table = self._tables.setdefault(geom, TranspositionTable(self.table_size))
+            while len(self._tables) > self.max_tables:
+                try:
+                    self._tables.popitem(last=False)
+                except KeyError:
+                    break
+        try:
+            self._tables.move_to_end(geom)
+        except KeyError:  # evicted by a concurrent lookup
+            pass
+        return table
+
+
+@dataclass
+class SearchStats:
+    nodes: int = 0
+    cutoffs: int = 0  # nodes that stopped early on an alpha-beta cutoff
+
+
+class MoveOrdering:
+    """Move order for alpha-beta, shared by every node of one search.
+
+    Moves that win on the spot come first, then moves that block an
+    opponent's win, then the killer moves of the same ply (the last two that
+    caused a cutoff in a sibling), then by history score (how much cutting
+    off they have done anywhere in the search), and finally cells that sit
+    on more lines.
+    """
+
+    _WIN = 1 << 40
+    _BLOCK = 1 << 39
+    _KILLER = 1 << 38
+
+    def __init__(self, geom: Geometry) -> None:
+        self.geom = geom
+        self.killers = [[-1, -1] for _ in range(geom.size + 1)]
+        self.history = [0] * geom.size
+
+    def order(self, me: int, opp: int, free: int, ply: int) -> List[int]:
+        """Free cells for the side with mask ``me``, best first."""
+        geom = self.geom
+        lines_through = geom.lines_through
+        rank = geom.cell_rank
+        history = self.history
+        killer_a, killer_b = self.killers[ply]
+        scores = {}
+        for move in geom.moves(free):
+            score = history[move] * 16 + rank[move]
+            if move == killer_a or move == killer_b:
+                score += self._KILLER
+            bit = 1 << move
+            for mask in lines_through[move]:
+                if (me | bit) & mask == mask:
+                    score += self._WIN
+                    break
+                if (opp | bit) & mask == mask:
+                    score += self._BLOCK
+                    break
+            scores[move] = score
+        return sorted(scores, key=scores.__getitem__, reverse=True)
+
+    def cutoff(self, move: int, ply: int, remaining: int) -> None:
+        """Record that ``move`` caused a cutoff with ``remaining`` plies below."""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] += remaining * remaining
+
+
+_DEFAULT_TABLES = TableCache()
+
+
+def minimax_best_move(
+    game: TicTacToe,
+    current_player: Player,
+    ai_player: Player,
+    table: Optional[TranspositionTable] = None,
+    stats: Optional[SearchStats] = None,
+    ordering: bool = True,
+) -> int:
+    """Return the best move for ``current_player``, scored for ``ai_player``.
+
+    Ties go to the lowest cell index. ``ordering=False`` searches moves in
+    index order, which only costs nodes (compare ``stats.nodes``).
+    """
+    if table is None:
+        table = _DEFAULT_TABLES.table(game.geometry)
+    order = MoveOrdering(game.geometry) if ordering else None
+    moves = game.available_moves()
+    if game._check_winner() is not None:
+        # Nothing left to play for; every move scores the same.
+        return moves[0] if moves else -1
+    # One scratch board for the whole search, played with push/pop.
+    board = game.clone()
     best_score = float("-inf")
     best_move = -1
-    for move in game.available_moves():
-        game_after_move = game.clone()
-        game_after_move.make_move(move, current_player)
-        score = _minimax(game_after_move, other_player(current_player), ai_player, is_max_turn=False, alpha=float("-inf"), beta=float("inf"))
+    for move in moves:
+        board.push(move, current_player)
+        score = _minimax(board, other_player(current_player), ai_player, is_max_turn=False, alpha=float("-inf"), beta=float("inf"), table=table, stats=stats, ordering=order)
+        board.pop()
         if score > best_score:
             best_score = score
             best_move = move
     return best_move
 
 
-def _minimax(game: TicTacToe, player_to_move: Player, ai_player: Player, is_max_turn: bool, alpha: float, beta: float) -> float:
-    if game.is_terminal():
-        return game.evaluate(ai_player)
+def _minimax(
+    game: TicTacToe,
+    player_to_move: Player,
+    ai_player: Player,
+    is_max_turn: bool,
+    alpha: float,
+    beta: float,
+    table: Optional[TranspositionTable] = None,
+    stats: Optional[SearchStats] = None,
+    ordering: Optional[MoveOrdering] = None,
+) -> float:
+    # ``game`` is the caller's scratch board; it is the same again on return.
+    if stats is not None:
+        stats.nodes += 1
+    geom = game.geometry
+    # Only the last pushed move can have completed a line.
+    last = game._pushed[-1]
+    mover = other_player(player_to_move)
+    marks = game.x if mover == "X" else game.o
+    for mask in geom.lines_through[last]:
+        if marks & mask == mask:
+            return 1 if mover == ai_player else -1
+    occupied = game.x | game.o
+    if occupied == geom.full_mask:
+        return 0
+
+    key = None
+    if table is not None:
+        # The three bits above the canonical masks record whose turn it is,
+        # whose eyes we score with and whether this node maximizes; callers
+        # may search for the side that is not ``ai_player``.
+        shift = 2 * geom.size
+        key = (
+            canonical_key(game)
+            | (player_to_move == "O") << shift
+            | (ai_player == "O") << shift + 1
+            | is_max_turn << shift + 2
+        )
+        entry = table.get(key)
+        if entry is not None:
+            cached, flag, _ = entry
+            if flag == EXACT:
+                return cached
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, cached)
+            else:
+                beta = min(beta, cached)
+            if alpha >= beta:
+                return cached
+    window_alpha, window_beta = alpha, beta
 
+    free = ~occupied & geom.full_mask
+    ply = len(game._pushed)
+    if ordering is not None:
+        me, opp = (game.x, game.o) if player_to_move == "X" else (game.o, game.x)
+        moves = ordering.order(me, opp, free, ply)
+    else:
+        # The shared move tuples avoid building a list per node.
+        moves = geom._moves_by_mask[free] if geom._moves_by_mask is not None else geom.moves(free)
+    cut = -1
     if is_max_turn:
         value = float("-inf")
-        for move in game.available_moves():
-            next_state = game.clone()
-            next_state.make_move(move, player_to_move)
-            value = max(value, _minimax(next_state, other_player(player_to_move), ai_player, is_max_turn=False, alpha=alpha, beta=beta))
+        for move in moves:
+            game.push(move, player_to_move)
+            value = max(value, _minimax(game, mover, ai_player, is_max_turn=False, alpha=alpha, beta=beta, table=table, stats=stats, ordering=ordering))
+            game.pop()
             alpha = max(alpha, value)
             if alpha >= beta:
+                cut = move
                 break
-        return value
     else:
         value = float("inf")
-        for move in game.available_moves():
-            next_state = game.clone()
-            next_state.make_move(move, player_to_move)
-            value = min(value, _minimax(next_state, other_player(player_to_move), ai_player, is_max_turn=True, alpha=alpha, beta=beta))
+        for move in moves:
+            game.push(move, player_to_move)
+            value = min(value, _minimax(game, mover, ai_player, is_max_turn=True, alpha=alpha, beta=beta, table=table, stats=stats, ordering=ordering))
+            game.pop()
             beta = min(beta, value)
             if alpha >= beta:
+                cut = move
                 break
+    if cut >= 0:
+        if stats is not None:
+            stats.cutoffs += 1
+        if ordering is not None:
+            ordering.cutoff(cut, ply, geom.size - ply)
+
+    if table is not None:
+        if value <= window_alpha:
+            flag = UPPER_BOUND
+        elif value >= window_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        table.store(key, value, flag)
+    return value
+
+
+WIN_SCORE = 1_000_000
+_WIN_THRESHOLD = WIN_SCORE - 10_000
+_INFINITY = WIN_SCORE + 1
+
+
+@dataclass
+class SearchResult:
+    move: int
+    score: int  # for the player to move; forced wins are WIN_SCORE minus plies to play
+    depth: int  # deepest iteration that finished
+    nodes: int
+    complete: bool  # True when the score is the game-theoretic value
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class _Negamax:
+    """Depth-limited negamax over (side to move, opponent) bitmasks."""
+
+    def __init__(self, geom: Geometry, table: TranspositionTable, deadline: Optional[float], node_budget: Optional[int]) -> None:
+        self.geom = geom
+        self.table = table
+        self.deadline = deadline
+        self.node_budget = node_budget
+        self.nodes = 0
+        self.ordering = MoveOrdering(geom)
+        # Weight of a line holding n stones of one player and none of the other.
+        self.line_weights = tuple(0 if n == 0 else 4 ** n for n in range(geom.k + 1))
+
+    def search(self, me: int, opp: int, last: int, depth: int, ply: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if self.node_budget is not None and self.nodes > self.node_budget:
+            raise _BudgetExceeded
+        if self.deadline is not None and not self.nodes & 511 and time.perf_counter() > self.deadline:
+            raise _BudgetExceeded
+
+        geom = self.geom
+        # The opponent just played ``last``; only lines through it can be new wins.
+        for mask in geom.lines_through[last]:
+            if opp & mask == mask:
+                return ply - WIN_SCORE
+        free = ~(me | opp) & geom.full_mask
+        if not free:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, opp)
+
+        key = geom.canonical(me, opp)
+        entry = self.table.get(key)
+        if entry is not None and entry[2] >= depth:
+            cached = _score_from_table(entry[0], ply)
+            flag = entry[1]
+            if flag == EXACT:
+                return cached
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, cached)
+            else:
+                beta = min(beta, cached)
+            if alpha >= beta:
+                return cached
+        window_alpha, window_beta = alpha, beta
+
+        value = -_INFINITY
+        for move in self.ordering.order(me, opp, free, ply):
+            score = -self.search(opp, me | 1 << move, move, depth - 1, ply + 1, -beta, -alpha)
+            if score > value:
+                value = score
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self.ordering.cutoff(move, ply, depth)
+                        break
+
+        if value <= window_alpha:
+            flag = UPPER_BOUND
+        elif value >= window_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, _score_to_table(value, ply), flag, depth)
+        return value
+
+    def evaluate(self, me: int, opp: int) -> int:
+        score = 0
+        weights = self.line_weights
+        for mask in self.geom.line_masks:
+            mine = me & mask
+            theirs = opp & mask
+            if mine and not theirs:
+                score += weights[mine.bit_count()]
+            elif theirs and not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+
+def _score_to_table(score: int, ply: int) -> int:
+    # Forced results are stored as distance from this node, not from the root.
+    if score > _WIN_THRESHOLD:
+        return score + ply
+    if score < -_WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    if score > _WIN_THRESHOLD:
+        return score - ply
+    if score < -_WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+_NEGAMAX_TABLES = TableCache()
+
+
+def negamax_best_move(
+    game: TicTacToe,
+    player: Player,
+    max_depth: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    node_budget: Optional[int] = None,
+    table: Optional[TranspositionTable] = None,
+) -> SearchResult:
+    """Iterative-deepening negamax for any board shape.
+
+    Searches one ply deeper per iteration until the game is solved,
+    ``max_depth`` is reached, or the time (seconds) or node budget runs out.
+    The move from the deepest finished iteration is returned, so a legal move
+    comes back even when the budget is too small to finish depth 1.
+    """
+    geom = game.geometry
+    moves = game.available_moves()
+    if not moves or game._check_winner() is not None:
+        return SearchResult(-1, 0, 0, 0, True)
+
+    if table is None:
+        table = _NEGAMAX_TABLES.table(geom)
+    me, opp = (game.x, game.o) if player == "X" else (game.o, game.x)
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    search = _Negamax(geom, table, deadline, node_budget)
+
+    # Try central cells first: they sit on the most lines.
+    center_r, center_c = (geom.rows - 1) / 2, (geom.cols - 1) / 2
+    moves.sort(key=lambda m: abs(m // geom.cols - center_r) + abs(m % geom.cols - center_c))
+
+    result = SearchResult(moves[0], 0, 0, 0, False)
+    limit = len(moves) if max_depth is None else max(1, min(max_depth, len(moves)))
+    for depth in range(1, limit + 1):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        best_move, best_score = moves[0], -_INFINITY
+        try:
+            alpha = -_INFINITY
+            for move in moves:
+                score = -search.search(opp, me | 1 << move, move, depth - 1, 1, -_INFINITY, -alpha)
+                if score > best_score:
+                    best_move, best_score = move, score
+                    alpha = max(alpha, score)
+        except _BudgetExceeded:
+            break
+        complete = depth == len(moves) or abs(best_score) > _WIN_THRESHOLD
+        result = SearchResult(best_move, best_score, depth, search.nodes, complete)
+        if complete:
+            break
+        # Search the best move first in the next iteration.
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+    result.nodes = search.nodes
+    return result
+
+
+@dataclass(frozen=True)
+class SolvedEntry:
+    value: int  # for the player to move: 1 win, 0 draw, -1 loss
+    best_moves: Tuple[int, ...]
+
+
+_SOLVED_TABLE: Optional[Dict[Tuple[int, int], SolvedEntry]] = None
+
+
+def solved_table() -> Dict[Tuple[int, int], SolvedEntry]:
+    """Return every position reachable from the empty board, solved.
+
+    Keys are the ``(x, o)`` bitboards of the position. The table is built on
+    first use and shared for the lifetime of the process.
+    """
+    global _SOLVED_TABLE
+    if _SOLVED_TABLE is None:
+        table: Dict[Tuple[int, int], SolvedEntry] = {}
+        _solve(TicTacToe(), "X", table)
+        _SOLVED_TABLE = table
+    return _SOLVED_TABLE
+
+
+def _solve(game: TicTacToe, player_to_move: Player, table: Dict[Tuple[int, int], SolvedEntry]) -> int:
+    key = (game.x, game.o)
+    entry = table.get(key)
+    if entry is not None:
+        return entry.value
+
+    if game.is_terminal():
+        # A finished game with a winner was won by the player who just moved.
+        value = -1 if game._check_winner() is not None else 0
+        table[key] = SolvedEntry(value, ())
         return value
 
+    scores: Dict[int, int] = {}
+    for move in game.available_moves():
+        game.push(move, player_to_move)
+        scores[move] = -_solve(game, other_player(player_to_move), table)
+        game.pop()
+    value = max(scores.values())
+    table[key] = SolvedEntry(value, tuple(m for m, s in scores.items() if s == value))
+    return value
+
+
+def player_to_move(game: TicTacToe) -> Optional[Player]:
+    x_count = bin(game.x).count("1")
+    o_count = bin(game.o).count("1")
+    if x_count == o_count:
+        return "X"
+    if x_count == o_count + 1:
+        return "O"
+    return None
+
+
+def solved_best_move(game: TicTacToe, current_player: Player) -> int:
+    """Look up the best move for ``current_player`` in the solved table.
+
+    Returns the same move as ``minimax_best_move(game, current_player,
+    current_player)``; positions missing from the table (unreachable boards or
+    the wrong side to move) fall back to that search.
+    """
+    if _SOLUTION is not None:
+        move = _SOLUTION.best_move(game.x, game.o)
+    else:
+        entry = solved_table().get((game.x, game.o))
+        move = entry.best_moves[0] if entry is not None and entry.best_moves else -1
+    if move < 0 or player_to_move(game) != current_player:
+        return minimax_best_move(game, current_player=current_player, ai_player=current_player)
+    return move
+
+
+# Solution file: a 16-byte header, then one little-endian uint16 per 3x3
+# board, indexed by the board read as a base-3 number (cell i is worth 3**i
+# times 0 for empty, 1 for X, 2 for O). Each entry packs the best-move cells
+# in bits 0-8, the value for the side to move plus one in bits 9-10, and a
+# valid flag in bit 15; unreachable boards are 0.
+SOLUTION_MAGIC = b"TTTSOL"
+SOLUTION_VERSION = 1
+_SOLUTION_HEADER = struct.Struct("<6sHBBBxI")  # magic, version, rows, cols, k, entry count
+_SOLUTION_ENTRY = struct.Struct("<H")
+_SOLUTION_ENTRIES = 3 ** 9
+_VALID_BIT = 1 << 15
+
+# Base-3 value of each 9-bit occupancy mask, so an index is two lookups.
+_BASE3 = tuple(sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(1 << 9))
+
+
+def base3_index(x: int, o: int) -> int:
+    return _BASE3[x] + 2 * _BASE3[o]
+
+
+def write_solution_file(path: str) -> int:
+    """Write the solved 3x3 table to ``path``; returns the positions written.
+
+    The file is written beside ``path`` and renamed into place, so processes
+    that already mapped the old file keep a consistent view.
+    """
+    entries = [0] * _SOLUTION_ENTRIES
+    for (x, o), entry in solved_table().items():
+        mask = sum(1 << move for move in entry.best_moves)
+        entries[base3_index(x, o)] = _VALID_BIT | (entry.value + 1) << 9 | mask
+    data = bytearray(_SOLUTION_HEADER.pack(SOLUTION_MAGIC, SOLUTION_VERSION, 3, 3, 3, _SOLUTION_ENTRIES))
+    data += struct.pack(f"<{_SOLUTION_ENTRIES}H", *entries)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+    return len(solved_table())
+
+
+class SolutionFile:
+    """Read-only, memory-mapped view of a file from ``write_solution_file``.
+
+    Every process that maps the file shares the same page-cache copy, and
+    opening it costs nothing beyond checking the header.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < _SOLUTION_HEADER.size:
+                raise ValueError(f"{path}: too short for a solution file")
+            magic, version, rows, cols, k, count = _SOLUTION_HEADER.unpack_from(self._map)
+            if magic != SOLUTION_MAGIC:
+                raise ValueError(f"{path}: not a solution file")
+            if version != SOLUTION_VERSION:
+                raise ValueError(f"{path}: solution file version {version}, expected {SOLUTION_VERSION}")
+            if (rows, cols, k) != (3, 3, 3) or count != _SOLUTION_ENTRIES:
+                raise ValueError(f"{path}: unsupported board {rows}x{cols}, k={k}")
+            if len(self._map) != _SOLUTION_HEADER.size + count * _SOLUTION_ENTRY.size:
+                raise ValueError(f"{path}: truncated solution file")
+        except ValueError:
+            self._map.close()
+            raise
+
+    def get(self, x: int, o: int) -> Optional[SolvedEntry]:
+        offset = _SOLUTION_HEADER.size + base3_index(x, o) * _SOLUTION_ENTRY.size
+        packed = _SOLUTION_ENTRY.unpack_from(self._map, offset)[0]
+        if not packed & _VALID_BIT:
+            return None
+        return SolvedEntry((packed >> 9 & 3) - 1, STANDARD._moves_by_mask[packed & STANDARD.full_mask])
+
+    def best_move(self, x: int, o: int) -> int:
+        """The lowest-numbered best move, or -1 for unknown and finished boards."""
+        offset = _SOLUTION_HEADER.size + (_BASE3[x] + 2 * _BASE3[o]) * _SOLUTION_ENTRY.size
+        moves = _SOLUTION_ENTRY.unpack_from(self._map, offset)[0] & STANDARD.full_mask
+        return (moves & -moves).bit_length() - 1
+
+    def close(self) -> None:
+        self._map.close()
+
+
+_SOLUTION: Optional[SolutionFile] = None
+
+
+def load_solution_file(path: str) -> SolutionFile:
+    """Answer ``solved_best_move`` from the file at ``path`` from now on."""
+    global _SOLUTION
+    _SOLUTION = SolutionFile(path)
+    return _SOLUTION
+
 
 def format_board(board: List[str]) -> str:
     rows = [
@@ -0,0 +1,162 @@
+"""Self-play tournaments between AI engines, spread over all cores.
+
+Example::
+
+    python tournament.py beginner expert --games 1000000
+
+Engine A plays X in even-numbered games and O in odd ones. Results are
+reported from A's side as win/draw/loss counts, split by the mark A played.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from engines import ENGINES, Engine
+from tictactoe import STANDARD, Geometry, Player, TicTacToe, geometry, other_player
+
+
+DEFAULT_CHUNK_GAMES = 2_000
+
+# (mode_a, mode_b, first_game, games, seed, rows, cols, k)
+_Task = Tuple[str, str, int, int, int, int, int, int]
+
+
+@dataclass
+class TournamentResult:
+    engine_a: str
+    engine_b: str
+    games: int
+    seconds: float
+    workers: int
+    a_as_x: Tuple[int, int, int]  # A's wins, draws, losses
+    a_as_o: Tuple[int, int, int]
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else float("inf")
+
+    def table(self) -> str:
+        total = tuple(x + o for x, o in zip(self.a_as_x, self.a_as_o))
+        rows = [
+            f"{self.engine_a} vs {self.engine_b}: {self.games} games in {self.seconds:.2f}s "
+            f"({self.games_per_second:,.0f} games/s on {self.workers} workers)",
+            f"{'':<18}{'win':>10}{'draw':>10}{'loss':>10}",
+        ]
+        for label, (win, draw, loss) in (
+            (f"{self.engine_a} as X", self.a_as_x),
+            (f"{self.engine_a} as O", self.a_as_o),
+            ("total", total),
+        ):
+            rows.append(f"{label:<18}{win:>10}{draw:>10}{loss:>10}")
+        return "\n".join(rows)
+
+
+def play_game(engine_x: Engine, engine_o: Engine, rng: random.Random, geom: Geometry) -> Optional[Player]:
+    """Play one game to the end and return the winner (None for a draw)."""
+    game = TicTacToe(geom.rows, geom.cols, geom.k)
+    player = "X"
+    while True:
+        engine = engine_x if player == "X" else engine_o
+        move = engine(game, player, rng)
+        if not game.is_legal(move):
+            raise RuntimeError(f"Engine returned illegal move {move} for {game.board}")
+        game.place(move, player)
+        marks = game.x if player == "X" else game.o
+        for mask in geom.lines_through[move]:
+            if marks & mask == mask:
+                return player
+        if (game.x | game.o) == geom.full_mask:
+            return None
+        player = other_player(player)
+
+
+def _play_chunk(task: _Task) -> List[int]:
+    mode_a, mode_b, first_game, games, seed, rows, cols, k = task
+    engine_a, engine_b = ENGINES[mode_a], ENGINES[mode_b]
+    geom = geometry(rows, cols, k)
+    rng = random.Random(seed)
+    # A as X: win, draw, loss; then A as O: win, draw, loss.
+    counts = [0] * 6
+    for n in range(first_game, first_game + games):
+        a_mark = "X" if n % 2 == 0 else "O"
+        if a_mark == "X":
+            winner = play_game(engine_a, engine_b, rng, geom)
+        else:
+            winner = play_game(engine_b, engine_a, rng, geom)
+        offset = 0 if a_mark == "X" else 3
+        if winner is None:
+            counts[offset + 1] += 1
+        elif winner == a_mark:
+            counts[offset] += 1
+        else:
+            counts[offset + 2] += 1
+    return counts
+
+
+def _tasks(mode_a: str, mode_b: str, games: int, chunk: int, seed: int, geom: Geometry) -> Iterator[_Task]:
+    for index, first in enumerate(range(0, games, chunk)):
+        yield (mode_a, mode_b, first, min(chunk, games - first), seed + index, geom.rows, geom.cols, geom.k)
+
+
+def run_tournament(
+    mode_a: str,
+    mode_b: str,
+    games: int,
+    workers: Optional[int] = None,
+    chunk: int = DEFAULT_CHUNK_GAMES,
+    seed: int = 0,
+    geom: Geometry = STANDARD,
+) -> TournamentResult:
+    for mode in (mode_a, mode_b):
+        if mode not in ENGINES:
+            raise ValueError(f"Unknown engine {mode!r}; choose from {', '.join(ENGINES)}")
+    workers = workers or os.cpu_count() or 1
+    totals = [0] * 6
+    started = time.perf_counter()
+    tasks = _tasks(mode_a, mode_b, games, chunk, seed, geom)
+    if workers == 1:
+        for counts in map(_play_chunk, tasks):
+            totals = [t + c for t, c in zip(totals, counts)]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for counts in pool.imap_unordered(_play_chunk, tasks):
+                totals = [t + c for t, c in zip(totals, counts)]
+    seconds = time.perf_counter() - started
+    return TournamentResult(
+        mode_a, mode_b, games, seconds, workers,
+        (totals[0], totals[1], totals[2]), (totals[3], totals[4], totals[5]),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Play AI engines against each other.")
+    parser.add_argument("engine_a", choices=sorted(ENGINES))
+    parser.add_argument("engine_b", choices=sorted(ENGINES))
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_GAMES, help="games per task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=None)
+    parser.add_argument("--k", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    cols = args.cols or args.rows
+    geom = geometry(args.rows, cols, args.k or min(args.rows, cols))
+    result = run_tournament(args.engine_a, args.engine_b, args.games, args.workers, args.chunk, args.seed, geom)
+    if args.json:
+        print(json.dumps(dict(asdict(result), games_per_second=result.games_per_second)))
+    else:
+        print(result.table())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""Production WSGI entry point for a pre-fork server.
+
+Importing this module loads the app and runs ``warm_up()``: the solution
+file is mapped, templates are compiled, board tables are built and every
+engine has run once. With ``preload_app`` (see gunicorn.conf.py) that
+happens once in the master, and the forked workers start warm, sharing the
+memory copy-on-write. ``/readyz`` answers 200 once this is done.
+
+    gunicorn -c gunicorn.conf.py
+"""
+from app import app, warm_up
+
+warm_up()
+application = app